@@ -0,0 +1,204 @@
+#! /usr/bin/env python3
+
+"""Бенчмарк клиентов и протокола на симуляторе лазера в петлевом режиме.
+
+Симулятор запускается в том же процессе. Измеряются:
+    * задержка одиночной команды (перцентили) для TCP, UDP и RS-232 (через pty);
+    * устойчивая производительность, команд в секунду, в том числе send_many;
+    * процессорное время клиента на одну команду (time.thread_time потока клиента,
+      без учета времени симулятора);
+    * масштабирование при числе одновременно работающих клиентов.
+
+Результаты выводятся в формате JSON (--output для записи в файл), что
+позволяет сравнивать прогоны между собой.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+from typing import Callable
+
+from laser.async_client import AsyncLaserTcpClient, gather_send
+from laser.client import LaserTcpClient, LaserUdpClient
+from laser.device import RFL_C3000S
+from laser.protocol import Protocol
+from laser.simulator import LaserSimulator, VirtualLaser
+
+SWEEP = [("RCS", None), ("RPRR", None), ("RBT", None), ("RPW", None), ("RCT", None),
+         ("ROP", None), ("STA", None), ("RSN", None), ("RIP", None), ("RMASK", None),
+         ("RUT", None), ("RDT", None)]
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Перцентили задержки в микросекундах."""
+
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6   # noqa: E731
+    return {"p50_us": pick(0.50), "p90_us": pick(0.90), "p99_us": pick(0.99),
+            "max_us": samples[-1] * 1e6, "mean_us": statistics.fmean(samples) * 1e6}
+
+
+def latency(client: Protocol, count: int) -> dict[str, float]:
+    """Задержка одиночной команды STA."""
+
+    for _ in range(min(count, 100)):                        # прогрев
+        client.send("STA")
+
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.send("STA")
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def throughput(func: Callable[[], object], commands: int, count: int) -> dict[str, float]:
+    """Команд в секунду и процессорное время клиента на команду."""
+
+    cpu, start = time.thread_time(), time.perf_counter()
+    for _ in range(count):
+        func()
+    elapsed, cpu = time.perf_counter() - start, time.thread_time() - cpu
+    return {"commands_per_s": commands * count / elapsed,
+            "cpu_us_per_command": cpu / (commands * count) * 1e6}
+
+
+def bench_client(client: Protocol, count: int, batched: bool) -> dict[str, object]:
+    """Полный набор измерений для одного клиента."""
+
+    result: dict[str, object] = {"latency": latency(client, count),
+                                 "send": throughput(lambda: client.send("STA"), 1, count)}
+    if batched:
+        result["send_many"] = throughput(lambda: client.send_many(SWEEP), len(SWEEP),
+                                         max(1, count // len(SWEEP)))
+    return result
+
+
+def serve_pty(laser: VirtualLaser, fd: int) -> None:
+    """Обслуживание виртуального лазера на ведущей стороне pty."""
+
+    buffer = b""
+    while True:
+        try:
+            data = os.read(fd, 1024)
+        except OSError:
+            return
+        *frames, buffer = (buffer + data).split(b"\r")
+        for frame in frames:
+            os.write(fd, laser.process(frame.decode("ascii") + "\r").encode("ascii"))
+
+
+def bench_serial(count: int) -> dict[str, object]:
+    """Измерения для LaserSerialClient через псевдотерминал."""
+
+    try:
+        import tty
+
+        from laser.client import LaserSerialClient
+    except ImportError as err:
+        return {"skipped": str(err)}
+
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    threading.Thread(target=serve_pty, args=(VirtualLaser(), master), daemon=True).start()
+    try:
+        client = LaserSerialClient(RFL_C3000S, address=os.ttyname(slave), baudrate=115200)
+        return bench_client(client, count, batched=True)
+    finally:
+        os.close(slave)
+
+
+def bench_scaling(simulator: LaserSimulator, port: int, count: int,
+                  levels: list[int]) -> dict[str, dict[str, float]]:
+    """Суммарная производительность нескольких потоков со своими TCP-соединениями."""
+
+    result = {}
+    for level in levels:
+        clients = [LaserTcpClient(RFL_C3000S, f"{simulator.host}:{port}") for _ in range(level)]
+        barrier = threading.Barrier(level + 1)
+
+        def worker(client: LaserTcpClient) -> None:
+            barrier.wait()
+            for _ in range(count):
+                client.send("STA")
+
+        threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        result[str(level)] = {"commands_per_s": level * count / elapsed}
+        for client in clients:
+            client.close()
+    return result
+
+
+def bench_fanout(simulator: LaserSimulator, levels: list[int], rounds: int) -> dict[str, dict[str, float]]:
+    """Время опроса N лазеров одной командой через gather_send."""
+
+    ports = [simulator.run(simulator.add_tcp(VirtualLaser())) for _ in range(max(levels))]
+
+    async def run(level: int) -> list[float]:
+        clients = [AsyncLaserTcpClient(RFL_C3000S, f"{simulator.host}:{port}") for port in ports[:level]]
+        await asyncio.gather(*(client.connect() for client in clients))
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            await gather_send(clients, "STA")
+            samples.append(time.perf_counter() - start)
+        for client in clients:
+            await client.close()
+        return samples
+
+    return {str(level): percentiles(asyncio.run(run(level))) for level in levels}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laser client stack benchmark")
+    parser.add_argument("--count", type=int, default=2000,
+                                   help="requests per measurement")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                                     help="concurrency levels for scaling runs")
+    parser.add_argument("--output", type=str, default=None,
+                                    help="write JSON results to file")
+    args = parser.parse_args()
+
+    simulator = LaserSimulator()
+    simulator.start()
+    try:
+        tcp_port = simulator.run(simulator.add_tcp(VirtualLaser()))
+        udp_port = simulator.run(simulator.add_udp(VirtualLaser()))
+
+        tcp = LaserTcpClient(RFL_C3000S, f"{simulator.host}:{tcp_port}")
+        udp = LaserUdpClient(RFL_C3000S, f"{simulator.host}:{udp_port}")
+
+        results = {"meta": {"timestamp": time.time(),
+                            "python": platform.python_version(),
+                            "platform": platform.platform(),
+                            "count": args.count},
+                   "tcp": bench_client(tcp, args.count, batched=True),
+                   "udp": bench_client(udp, args.count, batched=False),
+                   "serial": bench_serial(args.count),
+                   "tcp_threads": bench_scaling(simulator, tcp_port, args.count // 4, args.clients),
+                   "async_fanout": bench_fanout(simulator, args.clients, max(1, args.count // 20)),
+                  }
+        tcp.close()
+    finally:
+        simulator.stop()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
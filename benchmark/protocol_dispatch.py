@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+
+"""Микро-бенчмарк разбора команд Protocol.send на петлевом устройстве.
+
+Сравнивается исходная реализация send (поиск по таблице, словарь лямбд и
+re.search с паттерном из f-строки на каждый вызов) с текущей реализацией
+на предварительно подготовленной таблице команд. Обмен выполняется с
+петлевым устройством, отвечающим заранее подготовленными ответами, поэтому
+измеряются только накладные расходы протокола.
+"""
+
+import argparse
+import time
+from re import search
+
+from laser.device import RFL_C3000S
+from laser.protocol import LaserProtocolError, Protocol
+
+COMMANDS = [("RCS", None), ("RPRR", None), ("RBT", None), ("RPW", None),
+            ("RCT", None), ("ROP", None), ("STA", None), ("RSN", None),
+            ("RIP", None), ("SPW", 100), ("SDC", 50), ("EMON", None)]
+
+
+class LoopbackClient(Protocol):
+    """Петлевое устройство с заранее подготовленными ответами."""
+
+    def __init__(self, device: dict) -> None:
+        """Подготовка ответов для набора команд бенчмарка."""
+
+        super().__init__(device)
+        self.replies = {}
+        for cmd, value in COMMANDS:
+            if value is not None:
+                self.replies[f"{cmd} {value}\r"] = f"{cmd}: {value}\r"
+            elif device[cmd]["func"] == "get":
+                self.replies[f"{cmd}\r"] = f"{cmd}: 1\r"
+            else:
+                self.replies[f"{cmd}\r"] = f"{cmd}\r"
+
+    def _bus_exchange(self, packet: str) -> str:
+        """Обмен с петлевым устройством."""
+
+        return self.replies[packet]
+
+
+class LegacyLoopbackClient(LoopbackClient):
+    """Петлевое устройство с исходной реализацией Protocol.send."""
+
+    def _compare(self, cmd: str, pattern: str) -> object:
+        result = self._bus_exchange(cmd)
+        if match := search(pattern, result):
+            return match
+        raise LaserProtocolError(result)
+
+    def _set(self, cmd: str, value: object = None) -> bool:
+        cmd, pattern = (f"{cmd}\r", f"{cmd}\r") if value is None else \
+                       (f"{cmd} {value}\r", f"{cmd}: {value}\r")
+        return bool(self._compare(cmd, pattern))
+
+    def _get(self, cmd: str, frmt: object) -> object:
+        cmd, pattern = (f"{cmd}\r", f"{cmd}: (\\S+)\r")
+        return frmt(self._compare(cmd, pattern)[1])
+
+    def send(self, cmd: str, value: object = None) -> object:
+        cmd = cmd.upper()
+        if not (device_info := self.device.get(cmd)):
+            msg = f"Unknown command {cmd}"
+            raise LaserProtocolError(msg)
+
+        frmt = device_info["type"]
+        func = device_info["func"]
+
+        return {"set": lambda: self._set(cmd, frmt(value) if frmt else None),
+                "get": lambda: self._get(cmd, frmt),
+               }[func]()
+
+
+def measure(client: Protocol, rounds: int) -> float:
+    """Количество команд в секунду."""
+
+    send = client.send
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for cmd, value in COMMANDS:
+            send(cmd, value)
+    return rounds * len(COMMANDS) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Protocol.send dispatch micro-benchmark")
+    parser.add_argument("--rounds", type=int, default=20000,
+                                    help="number of command sweeps")
+    args = parser.parse_args()
+
+    before = measure(LegacyLoopbackClient(RFL_C3000S), args.rounds)
+    after = measure(LoopbackClient(RFL_C3000S), args.rounds)
+
+    print(f"before: {before:12,.0f} cmd/s")
+    print(f"after:  {after:12,.0f} cmd/s")
+    print(f"speedup: {after / before:.2f}x")
@@ -0,0 +1,127 @@
+#! /usr/bin/env python3
+
+"""Бенчмарк времени запуска: импорт модулей пакета и короткие вызовы laser-console.
+
+Измеряются:
+    * время импорта модулей в новом процессе (медиана по запускам за вычетом
+      времени запуска пустого интерпретатора) и признак загрузки pyserial;
+    * собственное и суммарное время импорта модуля по python -X importtime;
+    * полное время одного вызова laser-console --send на симуляторе;
+    * время подготовки таблицы команд устройства: первый и повторный вызов.
+
+Результаты выводятся в формате JSON (--output для записи в файл).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from laser.device import DEVICES, _COMPILED, compile_device
+from laser.simulator import LaserSimulator, VirtualLaser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["laser.device", "laser.protocol", "laser.client", "laser.async_client",
+           "laser.pool", "laser.sampler", "laser.status", "laser.telemetry", "laser.udp"]
+
+
+def run(args: list[str], runs: int) -> float:
+    """Медиана времени выполнения процесса, секунды."""
+
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def importtime(module: str) -> dict[str, float]:
+    """Собственное и суммарное время импорта модуля по -X importtime, мс."""
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, check=True, capture_output=True, text=True).stderr
+    for line in output.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return {"self_ms": int(fields[0].rsplit(":", 1)[1]) / 1000, "cumulative_ms": int(fields[1]) / 1000}
+    return {}
+
+
+def bench_imports(runs: int) -> dict[str, dict[str, object]]:
+    """Время импорта модулей пакета в новом процессе."""
+
+    baseline = run([sys.executable, "-c", "pass"], runs)
+    result: dict[str, dict[str, object]] = {"python": {"startup_ms": baseline * 1e3}}
+    for module in MODULES:
+        probe = f"import sys, {module}; print('serial' in sys.modules)"
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        serial = subprocess.run([sys.executable, "-c", probe], env=env, check=True,
+                                capture_output=True, text=True).stdout.strip() == "True"
+        result[module] = {"import_ms": (run([sys.executable, "-c", f"import {module}"], runs) - baseline) * 1e3,
+                          "imports_pyserial": serial, **importtime(module)}
+    return result
+
+
+def bench_console(runs: int) -> dict[str, float]:
+    """Полное время вызова laser-console --send STA по TCP."""
+
+    simulator = LaserSimulator()
+    simulator.start()
+    try:
+        port = simulator.run(simulator.add_tcp(VirtualLaser()))
+        console = [sys.executable, os.path.join(ROOT, "scripts", "laser-console"), "--device", "RFL_C3000S",
+                   "--method", "TCP", "--address", f"{simulator.host}:{port}"]
+        return {"help_ms": run([*console, "--help"], runs) * 1e3,
+                "send_ms": run([*console, "--send", "STA"], runs) * 1e3}
+    finally:
+        simulator.stop()
+
+
+def bench_compile(count: int) -> dict[str, float]:
+    """Время подготовки таблицы команд: без кэша и из кэша, мкс."""
+
+    device = DEVICES["RFL_C3000S"]
+    start = time.perf_counter()
+    for _ in range(count):
+        _COMPILED.clear()
+        compile_device(device)
+    cold = (time.perf_counter() - start) / count
+
+    start = time.perf_counter()
+    for _ in range(count):
+        compile_device(device)
+    warm = (time.perf_counter() - start) / count
+    return {"first_us": cold * 1e6, "cached_us": warm * 1e6}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laser package startup benchmark")
+    parser.add_argument("--runs", type=int, default=10,
+                                  help="process launches per measurement")
+    parser.add_argument("--output", type=str, default=None,
+                                    help="write JSON results to file")
+    args = parser.parse_args()
+
+    results = {"meta": {"timestamp": time.time(),
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "runs": args.runs},
+               "imports": bench_imports(args.runs),
+               "console": bench_console(args.runs),
+               "compile_device": bench_compile(1000),
+              }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
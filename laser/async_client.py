@@ -0,0 +1,316 @@
+#! /usr/bin/env python3
+
+"""Реализация асинхронных классов клиентов для управления лазером."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from functools import partial
+from re import Pattern
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Iterable, NoReturn
+
+from .protocol import _MISSING, LaserProtocolError, Protocol
+
+if TYPE_CHECKING:
+    from serial import Serial
+
+    from .device import LASER_DEVICE
+
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+
+def log(func: Callable) -> Callable:
+    """Вывод отладочной информации."""
+
+    async def wrapper(self: AsyncProtocol, packet: str) -> str:
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            _logger.debug("Send frame: %r", packet)
+        answer = await func(self, packet)
+        if debug:
+            _logger.debug("Recv frame: %r", answer)
+        return answer
+
+    return wrapper
+
+
+class AsyncProtocol(Protocol):
+    """Класс асинхронного протокола управления лазером.
+
+    Вызов connect необязателен: соединение устанавливается при первом обмене.
+    """
+
+    def __init__(self, device: LASER_DEVICE, timeout: float = 1.0) -> None:
+        """Инициализация класса AsyncProtocol."""
+
+        super().__init__(device)
+        self.timeout = timeout
+        self._lock: asyncio.Lock | None = None     # создается в цикле событий при первом обмене
+
+    async def __aenter__(self) -> AsyncProtocol:
+        """Установка соединения при входе в контекстный менеджер."""
+
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Закрытие соединения при выходе из контекстного менеджера."""
+
+        await self.close()
+
+    async def connect(self) -> None:
+        """Установка соединения с устройством."""
+
+    async def close(self) -> None:
+        """Закрытие соединения с устройством."""
+
+        raise NotImplementedError
+
+    async def _bus_exchange(self, packet: str) -> str:     # type: ignore
+        """Обмен по интерфейсу."""
+
+        raise NotImplementedError
+
+    def _exchange_lock(self) -> asyncio.Lock:
+        """Блокировка обмена клиента (обмены разных задач не перемешиваются)."""
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def subscribe(self, cmd: str, callback: Callable[[str, float | str], object],
+                        deadband: float = 0.0, interval: float = 1.0) -> NoReturn:
+        """Подписки выполняются синхронным планировщиком и для асинхронных клиентов недоступны."""
+
+        msg = f"{type(self).__name__} does not support subscriptions, use a synchronous client"
+        raise NotImplementedError(msg)
+
+    async def _transact(self, cmd: str, packet: str, reply: Pattern[str] | str,     # type: ignore
+                              convert: Callable | None) -> float | str | bool:
+        """Обмен с устройством и разбор ответа с учетом метрик."""
+
+        if (metrics := self.metrics) is None:
+            async with self._exchange_lock():
+                answer = await self._bus_exchange(packet)
+            return self._response(answer, reply, convert)
+
+        start = perf_counter()
+        try:
+            async with self._exchange_lock():
+                answer = await self._bus_exchange(packet)
+        except asyncio.TimeoutError:                        # до Python 3.11 не является OSError
+            metrics.failure(cmd, TimeoutError())
+            raise
+        except OSError as err:
+            metrics.failure(cmd, err)
+            raise
+        metrics.exchange(cmd, perf_counter() - start, len(packet), len(answer))
+
+        try:
+            return self._response(answer, reply, convert)
+        except LaserProtocolError:
+            metrics.protocol_error(cmd)
+            raise
+
+    async def send(self, cmd: str, value: float | str | None = None) -> float | str | bool:     # type: ignore
+        """Послать команду в устройство."""
+
+        packet, reply, convert = self._request(cmd, value)
+        cmd = cmd.upper()
+        if (cache := self.cache) is None:
+            return await self._transact(cmd, packet, reply, convert)
+
+        if convert is None:
+            try:
+                return await self._transact(cmd, packet, reply, convert)
+            finally:
+                cache.invalidate(cmd)
+
+        if (result := cache.get(cmd)) is _MISSING:
+            result = await self._transact(cmd, packet, reply, convert)
+            cache.put(cmd, result)
+        return result                                       # type: ignore
+
+
+class AsyncLaserSerialClient(AsyncProtocol):
+    """Класс асинхронного клиента для управления лазером через порт RS-232.
+
+    Pyserial не поддерживает asyncio, поэтому обмен выполняется в пуле
+    потоков цикла событий.
+    """
+
+    def __init__(self, device: LASER_DEVICE, address: str = "COM1",
+                       baudrate: int = 9600, timeout: float = 1.0) -> None:
+        """Инициализация класса клиента с указанным адресом и устройством."""
+
+        super().__init__(device, timeout)
+        self.address = address
+        self.baudrate = baudrate
+        self.socket: Serial | None = None
+
+    async def connect(self) -> None:
+        """Открытие последовательного порта."""
+
+        from serial import Serial     # pyserial загружается только для порта RS-232
+
+        await super().connect()
+        loop = asyncio.get_running_loop()
+        self.socket = await loop.run_in_executor(None, partial(Serial, port=self.address,
+                                                                       baudrate=self.baudrate,
+                                                                       timeout=self.timeout))
+
+    async def close(self) -> None:
+        """Закрытие последовательного порта."""
+
+        if self.socket and self.socket.is_open:
+            self.socket.close()
+
+    def _serial_exchange(self, packet: str) -> str:
+        """Блокирующий обмен по последовательному порту."""
+
+        self.socket.reset_input_buffer()                    # type: ignore
+        self.socket.reset_output_buffer()                   # type: ignore
+
+        self.socket.write(packet.encode("ascii"))           # type: ignore
+        return self.socket.read_until(b"\r").decode("ascii")    # type: ignore
+
+    @log
+    async def _bus_exchange(self, packet: str) -> str:     # type: ignore
+        """Обмен по интерфейсу."""
+
+        if not (self.socket and self.socket.is_open):
+            await self.connect()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._serial_exchange, packet)
+
+
+class AsyncLaserTcpClient(AsyncProtocol):
+    """Класс асинхронного клиента для управления лазером по протоколу TCP.
+
+    После тайм-аута, отмены или ошибки обмена соединение закрывается и
+    открывается заново при следующем обмене: иначе опоздавший ответ остался
+    бы в потоке и был бы принят за ответ на следующую команду.
+    """
+
+    def __init__(self, device: LASER_DEVICE, address: str = "127.0.0.1:10001",
+                       timeout: float = 1.0) -> None:
+        """Инициализация класса клиента с указанным адресом и устройством."""
+
+        super().__init__(device, timeout)
+        self.ip, self.tcp_port = address.split(":")
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def connect(self) -> None:
+        """Установка TCP-соединения с устройством."""
+
+        await super().connect()
+        await self._open()
+
+    async def _open(self) -> None:
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.ip, int(self.tcp_port)), self.timeout)
+
+    def _drop(self) -> None:
+        """Закрытие соединения без ожидания (после сбоя обмена)."""
+
+        if self.writer:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def close(self) -> None:
+        """Закрытие TCP-соединения с устройством."""
+
+        if self.writer:
+            self.writer.close()
+            await self.writer.wait_closed()
+            self.reader = self.writer = None
+
+    @log
+    async def _bus_exchange(self, packet: str) -> str:     # type: ignore
+        """Обмен по интерфейсу."""
+
+        if self.writer is None:
+            await self._open()
+        try:
+            self.writer.write(packet.encode("ascii"))       # type: ignore
+            await self.writer.drain()                       # type: ignore
+            answer = await asyncio.wait_for(self.reader.readuntil(b"\r"), self.timeout)     # type: ignore
+        except (asyncio.TimeoutError, asyncio.CancelledError, asyncio.IncompleteReadError, OSError):
+            self._drop()
+            raise
+        return answer.decode("ascii")
+
+
+class _DatagramQueue(asyncio.DatagramProtocol):
+    """Очередь принятых UDP-датаграмм."""
+
+    def __init__(self) -> None:
+        """Инициализация очереди датаграмм."""
+
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Помещение принятой датаграммы в очередь."""
+
+        self.queue.put_nowait(data)
+
+
+class AsyncLaserUdpClient(AsyncProtocol):
+    """Класс асинхронного клиента для управления лазером по протоколу UDP."""
+
+    def __init__(self, device: LASER_DEVICE, address: str = "127.0.0.1:8099",
+                       timeout: float = 1.0) -> None:
+        """Инициализация класса клиента с указанным адресом и устройством."""
+
+        super().__init__(device, timeout)
+        self.ip, self.udp_port = address.split(":")
+        self.transport: asyncio.DatagramTransport | None = None
+        self.protocol: _DatagramQueue | None = None
+
+    async def connect(self) -> None:
+        """Создание UDP-сокета, связанного с адресом устройства."""
+
+        await super().connect()
+        loop = asyncio.get_running_loop()
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            _DatagramQueue, remote_addr=(self.ip, int(self.udp_port)))
+
+    async def close(self) -> None:
+        """Закрытие UDP-сокета."""
+
+        if self.transport:
+            self.transport.close()
+            self.transport = None
+
+    @log
+    async def _bus_exchange(self, packet: str) -> str:     # type: ignore
+        """Обмен по интерфейсу."""
+
+        if self.transport is None:
+            await self.connect()
+        queue = self.protocol.queue                         # type: ignore
+        while not queue.empty():                            # опоздавшие ответы
+            queue.get_nowait()
+
+        self.transport.sendto(packet.encode("ascii"))       # type: ignore
+        return (await asyncio.wait_for(queue.get(), self.timeout)).decode("ascii")
+
+
+async def gather_send(clients: Iterable[AsyncProtocol], cmd: str,
+                      value: float | str | None = None) -> list[float | str | bool | BaseException]:
+    """Послать одну команду в несколько устройств одновременно.
+
+    Ошибки отдельных устройств возвращаются в списке результатов вместо
+    значения и не прерывают опрос остальных.
+    """
+
+    return await asyncio.gather(*(client.send(cmd, value) for client in clients),
+                                return_exceptions=True)
+
+
+__all__ = ["AsyncLaserSerialClient", "AsyncLaserTcpClient", "AsyncLaserUdpClient",
+           "gather_send"]
@@ -6,10 +6,8 @@ import logging
 from socket import AF_INET, SOCK_DGRAM, SOCK_STREAM, socket
 from typing import Callable
 
-from serial import Serial
-
 from .device import LASER_DEVICE
-from .protocol import Protocol
+from .protocol import LaserProtocolError, Protocol
 
 _logger = logging.getLogger(__name__)
 _logger.addHandler(logging.NullHandler())
@@ -18,15 +16,86 @@ _logger.addHandler(logging.NullHandler())
 def log(func: Callable) -> Callable:
     """Вывод отладочной информации."""
 
-    def wrapper(self: Callable[[str], bytes], packet: str) -> str:
-        _logger.debug("Send frame: %r", packet)
-        answer = func(self, packet.encode("ascii")).decode("ascii")
-        _logger.debug("Recv frame: %r", answer)
+    def wrapper(self: Callable[[str], str], packet: str) -> str:
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            _logger.debug("Send frame: %r", packet)
+        answer = func(self, packet)
+        if debug:
+            _logger.debug("Recv frame: %r", answer)
         return answer
 
     return wrapper
 
 
+def log_many(func: Callable) -> Callable:
+    """Вывод отладочной информации пакетного обмена."""
+
+    def wrapper(self: Callable[[str, int], list[str]], packet: str, count: int) -> list[str]:
+        debug = _logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            _logger.debug("Send frames: %r", packet)
+        answers = func(self, packet, count)
+        if debug:
+            _logger.debug("Recv frames: %r", answers)
+        return answers
+
+    return wrapper
+
+
+class _FrameBuffer:
+    """Приемный буфер, разбивающий поток байт на кадры по символу CR.
+
+    Данные принимаются через recv_into прямо в заранее выделенный буфер,
+    а кадр декодируется в строку из memoryview без промежуточных копий.
+    Остаток данных после CR сохраняется до следующего чтения, поэтому
+    буфер корректно работает как с разбитыми, так и со склеенными ответами.
+    """
+
+    def __init__(self, size: int = 1024) -> None:
+        """Инициализация буфера заданного размера."""
+
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+
+    def clear(self) -> None:
+        """Сброс накопленных данных."""
+
+        self.start = self.end = 0
+
+    def read_frame(self, recv_into: Callable[[memoryview], int]) -> str:
+        """Чтение очередного кадра, включая завершающий CR."""
+
+        while (index := self.buffer.find(b"\r", self.start, self.end)) < 0:
+            if self.end == len(self.buffer):
+                if not self.start:
+                    self.clear()
+                    msg = "Receive buffer overflow"
+                    raise LaserProtocolError(msg)
+                size = self.end - self.start
+                self.view[:size] = self.view[self.start:self.end]
+                self.start, self.end = 0, size
+
+            try:
+                count = recv_into(self.view[self.end:])
+            except OSError:
+                self.clear()
+                raise
+            if not count:
+                self.clear()
+                msg = "Connection closed by device"
+                raise ConnectionError(msg)
+            self.end += count
+
+        frame = str(self.view[self.start:index + 1], "ascii")
+        self.start = index + 1
+        if self.start == self.end:
+            self.start = self.end = 0
+        return frame
+
+
 class LaserSerialClient(Protocol):
     """Класс клиента для управления лазером через порт RS-232."""
 
@@ -34,6 +103,8 @@ class LaserSerialClient(Protocol):
                        baudrate: int = 9600, timeout: float = 1.0) -> None:
         """Инициализация класса клиента с указанным адресом и устройством."""
 
+        from serial import Serial     # pyserial загружается только для порта RS-232
+
         super().__init__(device)
         self.socket = Serial(port=address, baudrate=baudrate, timeout=timeout)
 
@@ -44,14 +115,24 @@ class LaserSerialClient(Protocol):
             self.socket.close()
 
     @log
-    def _bus_exchange(self, packet: bytes) -> bytes:
+    def _bus_exchange(self, packet: str) -> str:
         """Обмен по интерфейсу."""
 
         self.socket.reset_input_buffer()
         self.socket.reset_output_buffer()
 
-        self.socket.write(packet)
-        return self.socket.read_until(b"\r")
+        self.socket.write(packet.encode("ascii"))
+        return self.socket.read_until(b"\r").decode("ascii")
+
+    @log_many
+    def _bus_exchange_many(self, packet: str, count: int) -> list[str]:
+        """Пакетный обмен по интерфейсу."""
+
+        self.socket.reset_input_buffer()
+        self.socket.reset_output_buffer()
+
+        self.socket.write(packet.encode("ascii"))
+        return [self.socket.read_until(b"\r").decode("ascii") for _ in range(count)]
 
 
 class LaserTcpClient(Protocol):
@@ -63,23 +144,68 @@ class LaserTcpClient(Protocol):
 
         super().__init__(device)
 
-        ip, tcp_port = address.split(":")
-        self.socket = socket(AF_INET, SOCK_STREAM)
-        self.socket.settimeout(timeout)
-        self.socket.connect((ip, int(tcp_port)))
+        self.ip, self.tcp_port = address.split(":")
+        self.timeout = timeout
+        self.socket = None
+        self.buffer = _FrameBuffer()
+        self.connect()
 
     def __del__(self) -> None:
         """Закрытие соединения с устройством при удалении объекта."""
 
+        self.close()
+
+    def connect(self) -> None:
+        """Установка соединения с устройством."""
+
+        sock = socket(AF_INET, SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect((self.ip, int(self.tcp_port)))
+        except OSError:
+            sock.close()
+            raise
+
+        self.socket = sock
+        self.buffer.clear()
+
+    def close(self) -> None:
+        """Закрытие соединения с устройством."""
+
         if self.socket:
             self.socket.close()
+            self.socket = None
 
     @log
-    def _bus_exchange(self, packet: bytes) -> bytes:
-        """Обмен по интерфейсу."""
-
-        self.socket.sendall(packet)
-        return self.socket.recv(64)
+    def _bus_exchange(self, packet: str) -> str:
+        """Обмен по интерфейсу.
+
+        После ошибки обмена (в том числе тайм-аута) соединение закрывается,
+        чтобы опоздавший ответ не был принят за ответ на следующий запрос;
+        следующий обмен устанавливает новое соединение.
+        """
+
+        if not self.socket:
+            self.connect()
+        try:
+            self.socket.sendall(packet.encode("ascii"))
+            return self.buffer.read_frame(self.socket.recv_into)
+        except OSError:
+            self.close()
+            raise
+
+    @log_many
+    def _bus_exchange_many(self, packet: str, count: int) -> list[str]:
+        """Пакетный обмен по интерфейсу."""
+
+        if not self.socket:
+            self.connect()
+        try:
+            self.socket.sendall(packet.encode("ascii"))
+            return [self.buffer.read_frame(self.socket.recv_into) for _ in range(count)]
+        except OSError:
+            self.close()
+            raise
 
 
 class LaserUdpClient(Protocol):
@@ -94,6 +220,8 @@ class LaserUdpClient(Protocol):
         self.ip, self.udp_port = address.split(":")
         self.socket = socket(AF_INET, SOCK_DGRAM)
         self.socket.settimeout(timeout)
+        self.buffer = bytearray(1024)
+        self.view = memoryview(self.buffer)
 
     def __del__(self) -> None:
         """Закрытие соединения с устройством при удалении объекта."""
@@ -102,11 +230,12 @@ class LaserUdpClient(Protocol):
             self.socket.close()
 
     @log
-    def _bus_exchange(self, packet: bytes) -> bytes:
+    def _bus_exchange(self, packet: str) -> str:
         """Обмен по интерфейсу."""
 
-        self.socket.sendto(packet, (self.ip, int(self.udp_port)))
-        return self.socket.recvfrom(64)[0]
+        self.socket.sendto(packet.encode("ascii"), (self.ip, int(self.udp_port)))
+        count, _ = self.socket.recvfrom_into(self.buffer)
+        return str(self.view[:count], "ascii")
 
 
 __all__ = ["LaserSerialClient", "LaserTcpClient", "LaserUdpClient"]
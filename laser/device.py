@@ -14,7 +14,8 @@
 
 from __future__ import annotations
 
-from typing import Literal, TypedDict
+import re
+from typing import Literal, NamedTuple, TypedDict
 
 
 class LASER_PARAMS(TypedDict):
@@ -25,6 +26,92 @@ class LASER_PARAMS(TypedDict):
 LASER_DEVICE = dict[str, LASER_PARAMS]
 
 
+class LASER_COMMAND(NamedTuple):
+    """Предварительно подготовленное описание команды устройства."""
+
+    name: str                               # название команды
+    func: Literal["set", "get"]             # назначение команды
+    type: object                            # тип аргумента или возвращаемого значения
+    request: str                            # кадр запроса без аргумента
+    reply: re.Pattern[str] | str | None     # регулярное выражение ответа для 'get',
+                                            # ожидаемый ответ для 'set' без аргумента
+    convert: object                         # преобразователь значения ответа ('get')
+
+
+LASER_COMMANDS = dict[str, LASER_COMMAND]
+
+
+# подготовленные таблицы команд: id таблицы настроек -> (таблица, команды)
+_COMPILED: dict[int, tuple[LASER_DEVICE, LASER_COMMANDS]] = {}
+
+
+def validate_device(device: LASER_DEVICE) -> None:
+    """Проверка таблицы настроек устройства."""
+
+    for name, params in device.items():
+        if not isinstance(name, str) or not name or name != name.upper():
+            msg = f"Invalid command name {name!r}"
+            raise ValueError(msg)
+        if params.get("func") not in ("set", "get"):
+            msg = f"Command {name}: invalid func {params.get('func')!r}"
+            raise ValueError(msg)
+        if params.get("type") not in ((int, float, str) if params["func"] == "get" else (None, int, float, str)):
+            msg = f"Command {name}: invalid type {params.get('type')!r}"
+            raise ValueError(msg)
+
+
+def compile_device(device: LASER_DEVICE) -> LASER_COMMANDS:
+    """Подготовка таблицы команд устройства для быстрого разбора запросов и ответов.
+
+    Таблица проверяется и подготавливается один раз; повторные вызовы для
+    того же объекта таблицы возвращают сохраненный результат, поэтому
+    таблицы настроек не должны изменяться после первого использования.
+    """
+
+    if (entry := _COMPILED.get(id(device))) is not None and entry[0] is device:
+        return entry[1]
+
+    validate_device(device)
+    commands: LASER_COMMANDS = {}
+    for name, params in device.items():
+        name = name.upper()
+        if params["func"] == "get":
+            reply: re.Pattern[str] | str | None = re.compile(f"{re.escape(name)}: (\\S+)\r")
+            convert = params["type"]
+        else:
+            reply = f"{name}\r" if params["type"] is None else None
+            convert = None
+        commands[name] = LASER_COMMAND(name, params["func"], params["type"],
+                                       f"{name}\r", reply, convert)
+    _COMPILED[id(device)] = (device, commands)
+    return commands
+
+
+# команды записи и соответствующие им команды чтения того же параметра
+SETTER_GETTER: dict[str, str] = {
+    "SPW":   "RPW",     # Pulse Width
+    "SPRR":  "RPRR",    # Pulse Repetition Rate
+    "SDC":   "RCS",     # Diode Current / Current Setpoint
+    "SIP":   "RIP",     # IP
+    "SMASK": "RMASK",   # Sub-net Mask
+    "SDGW":  "RDGW",    # Default Gateway
+    "SUT":   "RUT",     # Up Time
+    "SDT":   "RDT",     # Down Time
+}
+
+# время жизни (в секундах) кэшированных значений редко изменяемых параметров
+CACHE_TTL: dict[str, float] = {
+    "RSN":   3600.0,    # Serial Number
+    "RFV":   3600.0,    # Software revision
+    "RIP":   60.0,      # IP
+    "RMASK": 60.0,      # Sub-net Mask
+    "RDGW":  60.0,      # Default Gateway
+    "RUT":   60.0,      # Up Time
+    "RDT":   60.0,      # Down Time
+    "RPW":   60.0,      # Pulse Width
+    "RPRR":  60.0,      # Pulse Repetition Rate
+}
+
 # таблица настроек Raycus RFL-C3000S
 RFL_C3000S: LASER_DEVICE = {
     "ABF":     {"func": "set", "type": None},   # Aiming Beam OFF
@@ -207,3 +294,75 @@ YLR_SERIES: LASER_DEVICE = {
     "RSN":   {"func": "get", "type": int},      # Read Serial Number
     "STA":   {"func": "get", "type": int},      # Read device status
 }
+
+# биты слова состояния (ответ на команду STA): имя флага и номер бита
+STATUS_BITS: dict[str, int] = {
+    "authorization_time":            0,     # Authorization time
+    "overheat":                      1,     # Overheat
+    "laser_enabled":                 2,     # Laser enabled (emission on)
+    "high_back_reflection":          3,     # High Back Reflection Level
+    "external_control":              4,     # External AD mode
+    "slave_communication_abnormal":  6,     # Slave communication abnormal
+    "aiming_beam":                   8,     # Aiming Beam ON
+    "laser_ready":                   9,     # Laser ready
+    "qcw_mode":                      10,    # QCW mode
+    "main_power":                    11,    # Main power supply ON
+    "modulation":                    12,    # Modulation Enabled
+    "emitting":                      15,    # The laser is emitting beam
+    "gate_mode":                     16,    # Gate Mode Enabled
+    "external_enable":               18,    # External enable mode
+    "error":                         19,    # Laser is Error
+    "slow_rise_drop":                20,    # Slow rise and slow drop mode
+    "remote":                        21,    # The laser operates in 'REM'
+    "programming_mode":              22,    # Programming mode
+    "low_temperature":               24,    # Low temperature fault
+    "humidity_alarm":                25,    # Humidity alarm
+    "water_flow_alarm":              26,    # Flow alarm of water flow
+    "external_aiming_beam":          27,    # Aiming beam external
+    "water_flow_alarm_2":            28,    # Flow alarm of water flow
+    "critical_error":                29,    # Critical Error
+    "optical_interlock":             30,    # Optical Interlock active
+    "average_power_high":            31,    # Average power is too high
+}
+
+# таблицы битов состояния по названию таблицы настроек устройства
+DEVICE_STATUS: dict[str, dict[str, int]] = {
+    "RFL_C3000S":      STATUS_BITS,
+    "RFL_XZ_SERIES":   STATUS_BITS,
+    "RFL_ABP_SERIES":  STATUS_BITS,
+    "RFL_QCW150_1500": STATUS_BITS,
+    "YLR_SERIES":      STATUS_BITS,
+}
+
+# реестр таблиц настроек устройств по названию
+DEVICES: dict[str, LASER_DEVICE] = {
+    "RFL_C3000S":      RFL_C3000S,
+    "RFL_XZ_SERIES":   RFL_XZ_SERIES,
+    "RFL_ABP_SERIES":  RFL_ABP_SERIES,
+    "RFL_QCW150_1500": RFL_QCW150_1500,
+    "YLR_SERIES":      YLR_SERIES,
+}
+
+
+def list_devices() -> list[str]:
+    """Названия таблиц настроек из реестра."""
+
+    return sorted(DEVICES)
+
+
+def get_device(name: str) -> LASER_DEVICE:
+    """Таблица настроек устройства по названию с подготовкой таблицы команд."""
+
+    if (device := DEVICES.get(name.upper())) is None:
+        msg = f"Unknown device {name}, available: {', '.join(list_devices())}"
+        raise ValueError(msg)
+    compile_device(device)
+    return device
+
+
+def register_device(name: str, device: LASER_DEVICE) -> None:
+    """Добавление таблицы настроек устройства в реестр (с проверкой)."""
+
+    compile_device(device)
+    DEVICES[name.upper()] = device
+    DEVICE_STATUS.setdefault(name.upper(), STATUS_BITS)
@@ -0,0 +1,155 @@
+#! /usr/bin/env python3
+
+"""Сбор метрик обмена с лазером: задержки, ошибки, объем трафика."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from socket import timeout as socket_timeout
+from typing import Iterable
+
+# верхние границы интервалов гистограммы задержек, секунды
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class CommandStats:
+    """Счетчики одной команды."""
+
+    __slots__ = ("buckets", "bytes_in", "bytes_out", "count", "errors",
+                 "protocol_errors", "seconds", "timeouts")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.protocol_errors = 0
+
+
+class ExchangeMetrics:
+    """Метрики обмена клиента с устройством.
+
+    Подключается к клиенту присваиванием client.metrics = ExchangeMetrics().
+    На горячем пути выполняются только инкременты счетчиков; форматирование
+    выполняется при экспорте (snapshot, prometheus). Пакетные обмены
+    send_many учитываются под именем BATCH. Метки labels (например, адрес
+    лазера) добавляются ко всем экспортируемым метрикам.
+    """
+
+    def __init__(self, labels: dict[str, str] | None = None) -> None:
+        """Инициализация пустого набора метрик."""
+
+        self.labels = labels or {}
+        self.commands: dict[str, CommandStats] = {}
+        self.retries = 0
+
+    def _stats(self, cmd: str) -> CommandStats:
+        if (stats := self.commands.get(cmd)) is None:
+            stats = self.commands[cmd] = CommandStats()
+        return stats
+
+    def exchange(self, cmd: str, seconds: float, bytes_out: int, bytes_in: int) -> None:
+        """Учет завершенного обмена."""
+
+        stats = self._stats(cmd)
+        stats.buckets[bisect_left(BUCKETS, seconds)] += 1
+        stats.count += 1
+        stats.seconds += seconds
+        stats.bytes_out += bytes_out
+        stats.bytes_in += bytes_in
+
+    def failure(self, cmd: str, error: OSError) -> None:
+        """Учет ошибки обмена: тайм-аут или ошибка соединения."""
+
+        stats = self._stats(cmd)
+        if isinstance(error, (TimeoutError, socket_timeout)):
+            stats.timeouts += 1
+        else:
+            stats.errors += 1
+
+    def protocol_error(self, cmd: str) -> None:
+        """Учет ответа, не соответствующего протоколу."""
+
+        self._stats(cmd).protocol_errors += 1
+
+    def retry(self) -> None:
+        """Учет повтора запроса после переподключения."""
+
+        self.retries += 1
+
+    def reset(self) -> None:
+        """Сброс всех счетчиков."""
+
+        self.commands.clear()
+        self.retries = 0
+
+    def snapshot(self) -> dict:
+        """Снимок метрик в виде словаря."""
+
+        return {"labels": dict(self.labels),
+                "retries": self.retries,
+                "commands": {cmd: {"count": stats.count,
+                                   "seconds": stats.seconds,
+                                   "mean": stats.seconds / stats.count if stats.count else 0.0,
+                                   "buckets": dict(zip([*BUCKETS, float("inf")], stats.buckets)),
+                                   "bytes_out": stats.bytes_out,
+                                   "bytes_in": stats.bytes_in,
+                                   "timeouts": stats.timeouts,
+                                   "errors": stats.errors,
+                                   "protocol_errors": stats.protocol_errors,
+                                  } for cmd, stats in self.commands.items()},
+               }
+
+    def prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+
+        return prometheus_text([self])
+
+
+def _labels(labels: dict[str, str], **extra: str) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items.items()) + "}"
+
+
+def prometheus_text(metrics: Iterable[ExchangeMetrics]) -> str:
+    """Метрики нескольких клиентов в текстовом формате Prometheus.
+
+    Клиенты должны различаться метками labels.
+    """
+
+    metrics = list(metrics)
+    counters = (("laser_bytes_sent_total", "Bytes sent to the device", "bytes_out"),
+                ("laser_bytes_received_total", "Bytes received from the device", "bytes_in"),
+                ("laser_timeouts_total", "Exchanges that timed out", "timeouts"),
+                ("laser_connection_errors_total", "Exchanges failed with a connection error", "errors"),
+                ("laser_protocol_errors_total", "Replies rejected as protocol errors", "protocol_errors"))
+
+    lines = ["# HELP laser_exchange_seconds Device exchange latency",
+             "# TYPE laser_exchange_seconds histogram"]
+    for item in metrics:
+        for cmd, stats in item.commands.items():
+            cumulative = 0
+            for bound, count in zip([*BUCKETS, "+Inf"], stats.buckets):
+                cumulative += count
+                lines.append(f"laser_exchange_seconds_bucket{_labels(item.labels, cmd=cmd, le=str(bound))} {cumulative}")
+            lines.append(f"laser_exchange_seconds_sum{_labels(item.labels, cmd=cmd)} {stats.seconds}")
+            lines.append(f"laser_exchange_seconds_count{_labels(item.labels, cmd=cmd)} {stats.count}")
+
+    for name, description, field in counters:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for item in metrics:
+            lines += [f"{name}{_labels(item.labels, cmd=cmd)} {getattr(stats, field)}"
+                      for cmd, stats in item.commands.items()]
+
+    lines += ["# HELP laser_retries_total Requests retried after reconnect",
+              "# TYPE laser_retries_total counter"]
+    lines += [f"laser_retries_total{_labels(item.labels)} {item.retries}" for item in metrics]
+    return "\n".join(lines) + "\n"
+
+
+__all__ = ["BUCKETS", "ExchangeMetrics", "prometheus_text"]
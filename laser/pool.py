@@ -0,0 +1,176 @@
+#! /usr/bin/env python3
+
+"""Пул постоянных TCP-соединений с лазерами с автоматическим переподключением."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from socket import MSG_PEEK
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from .client import LaserTcpClient
+
+if TYPE_CHECKING:
+    from .device import LASER_DEVICE
+
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+
+class PooledLaserTcpClient(LaserTcpClient):
+    """TCP-клиент с переподключением, разделяемый между потоками.
+
+    Все обмены, включая проверку соединения и переподключение, выполняются
+    под блокировкой обмена клиента (Protocol.lock), поэтому кадры разных
+    потоков не перемешиваются. Перед каждым обменом соединение проверяется без
+    обращения к устройству; при разрыве соединения клиент переподключается с
+    экспоненциальной задержкой и повторяет запрос один раз. После тайм-аута
+    запрос не повторяется (устройство могло его уже выполнить): ошибка
+    передается вызывающему, а соединение восстанавливается при следующем обмене.
+    """
+
+    def __init__(self, device: LASER_DEVICE, address: str = "127.0.0.1:10001",
+                       timeout: float = 1.0, retries: int = 3, backoff: float = 0.1,
+                       max_backoff: float = 5.0) -> None:
+        """Инициализация клиента с параметрами переподключения."""
+
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.reconnects = 0
+        self.reconnect_time = 0.0
+        super().__init__(device, address, timeout)
+
+    def reconnect(self) -> None:
+        """Переподключение к устройству с экспоненциальной задержкой между попытками."""
+
+        self.close()
+
+        start = time.perf_counter()
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                self.connect()
+            except OSError as err:
+                _logger.debug("Reconnect to %s:%s failed: %s", self.ip, self.tcp_port, err)
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+            else:
+                break
+
+        self.reconnects += 1
+        self.reconnect_time = time.perf_counter() - start
+
+    def _checkout(self) -> None:
+        """Проверка соединения перед обменом без обращения к устройству.
+
+        Закрытое устройством соединение восстанавливается, а опоздавшие
+        ответы на прерванные запросы удаляются из сокета.
+        """
+
+        if not self.socket:
+            self.reconnect()
+            return
+
+        self.buffer.clear()
+        self.socket.setblocking(False)
+        try:
+            while self.socket.recv_into(self.buffer.view, 0, MSG_PEEK):
+                self.socket.recv_into(self.buffer.view)
+            alive = False
+        except BlockingIOError:
+            alive = True
+        except OSError:
+            alive = False
+        finally:
+            if self.socket:
+                self.socket.settimeout(self.timeout)
+
+        if not alive:
+            self.reconnect()
+
+    def _retry(self, func: Callable, *args: object) -> object:
+        """Выполнение обмена с переподключением и повтором при разрыве соединения."""
+
+        with self.lock:
+            self._checkout()
+            try:
+                return func(*args)
+            except ConnectionError:
+                self.reconnect()
+                if self.metrics is not None:
+                    self.metrics.retry()
+                return func(*args)
+
+    def send(self, cmd: str, value: float | str | None = None) -> float | str | bool:
+        """Послать команду в устройство."""
+
+        return self._retry(super().send, cmd, value)                # type: ignore
+
+    def send_many(self, commands: Iterable[tuple[str, float | str | None]]) -> list[float | str | bool]:
+        """Послать несколько команд в устройство одним пакетом."""
+
+        return self._retry(super().send_many, list(commands))       # type: ignore
+
+    def ping(self) -> bool:
+        """Проверка связи с устройством запросом статуса."""
+
+        try:
+            self.send("STA")
+        except Exception:
+            return False
+        return True
+
+
+class LaserConnectionPool:
+    """Пул TCP-клиентов, по одному постоянному соединению на адрес лазера."""
+
+    def __init__(self, timeout: float = 1.0, retries: int = 3, backoff: float = 0.1,
+                       max_backoff: float = 5.0) -> None:
+        """Инициализация пула с параметрами создаваемых клиентов."""
+
+        self.options = {"timeout": timeout, "retries": retries, "backoff": backoff,
+                        "max_backoff": max_backoff}
+        self.clients: dict[str, PooledLaserTcpClient] = {}
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> LaserConnectionPool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get(self, device: LASER_DEVICE, address: str) -> PooledLaserTcpClient:
+        """Получить клиент для адреса, создав соединение при первом обращении."""
+
+        with self.lock:
+            if not (client := self.clients.get(address)):
+                client = PooledLaserTcpClient(device, address, **self.options)
+                self.clients[address] = client
+            elif client.device is not device:
+                msg = f"Address {address} is already used with another device"
+                raise ValueError(msg)
+        return client
+
+    def ping(self) -> dict[str, bool]:
+        """Проверка связи со всеми устройствами пула."""
+
+        with self.lock:
+            clients = dict(self.clients)
+        return {address: client.ping() for address, client in clients.items()}
+
+    def close(self) -> None:
+        """Закрытие всех соединений пула."""
+
+        with self.lock:
+            for client in self.clients.values():
+                with client.lock:
+                    client.close()
+            self.clients.clear()
+
+
+__all__ = ["LaserConnectionPool", "PooledLaserTcpClient"]
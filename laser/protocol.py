@@ -4,65 +4,284 @@
 
 from __future__ import annotations
 
-from re import Match, search
-from typing import TYPE_CHECKING
+import threading
+from collections import OrderedDict, deque
+from re import Pattern
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from .device import CACHE_TTL, SETTER_GETTER, compile_device
 
 if TYPE_CHECKING:
     from .device import LASER_DEVICE
+    from .metrics import ExchangeMetrics
+    from .subscription import Subscription, SubscriptionScheduler
 
 
 class LaserProtocolError(Exception):
     pass
 
 
+_MISSING = object()
+
+
+class ResponseCache:
+    """Кэш значений редко изменяемых параметров с ограниченным временем жизни.
+
+    Кэшируются только команды чтения, указанные в ttl. Успешная или неуспешная
+    команда записи удаляет из кэша значение соответствующей команды чтения
+    (таблица invalidates). При превышении maxsize вытесняются давно не
+    использованные значения. Методы кэша потокобезопасны.
+    """
+
+    def __init__(self, ttl: dict[str, float] | None = None,
+                       invalidates: dict[str, str] | None = None, maxsize: int = 64) -> None:
+        """Инициализация кэша с таблицами времени жизни и инвалидации."""
+
+        self.ttl = CACHE_TTL if ttl is None else ttl
+        self.invalidates = SETTER_GETTER if invalidates is None else invalidates
+        self.maxsize = maxsize
+        self.entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, cmd: str) -> object:
+        """Получить значение из кэша или _MISSING."""
+
+        with self.lock:
+            if (entry := self.entries.get(cmd)) is None:
+                if cmd in self.ttl:
+                    self.misses += 1
+                return _MISSING
+
+            expires, value = entry
+            if expires < monotonic():
+                del self.entries[cmd]
+                self.misses += 1
+                return _MISSING
+
+            self.entries.move_to_end(cmd)
+            self.hits += 1
+            return value
+
+    def put(self, cmd: str, value: object) -> None:
+        """Сохранить значение, если команда кэшируемая."""
+
+        if (ttl := self.ttl.get(cmd)) is None:
+            return
+
+        with self.lock:
+            self.entries[cmd] = (monotonic() + ttl, value)
+            self.entries.move_to_end(cmd)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, cmd: str) -> None:
+        """Удалить значение, изменяемое командой записи cmd."""
+
+        if getter := self.invalidates.get(cmd):
+            with self.lock:
+                self.entries.pop(getter, None)
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Счетчики попаданий и промахов."""
+
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+
 class Protocol:
     """Класс протокола управления лазером."""
 
+    cache: ResponseCache | None = None          # кэш ответов, по умолчанию отключен
+    metrics: ExchangeMetrics | None = None      # сбор метрик, по умолчанию отключен
+    scheduler: SubscriptionScheduler | None = None  # планировщик подписок, создается при subscribe
+
     def __init__(self, device: LASER_DEVICE) -> None:
         """Инициализация класса Protocol."""
 
         self.device = device
+        self.commands = compile_device(device)
+        self.lock = threading.RLock()               # обмены разных потоков не перемешиваются
 
     def _bus_exchange(self, packet: str) -> str:
         """Обмен по интерфейсу."""
 
         raise NotImplementedError
 
-    def _compare(self, cmd: str, pattern: str) -> Match[str]:
-        """Сравнение результата обмена с заданным паттерном."""
+    def _bus_exchange_many(self, packet: str, count: int) -> list[str]:
+        """Пакетный обмен по интерфейсу: отправка нескольких кадров и прием count ответов."""
 
-        result = self._bus_exchange(cmd)
-        if match := search(pattern, result):
-            return match
-        raise LaserProtocolError(result)
+        raise NotImplementedError
 
-    def _set(self, cmd: str, value: float | str | None = None) -> bool:
-        """Записать новое значение параметра."""
+    def _request(self, cmd: str, value: float | str | None = None) -> tuple[str, Pattern[str] | str, Callable | None]:
+        """Подготовка кадра запроса, ожидаемого ответа и преобразователя значения."""
 
-        cmd, pattern = (f"{cmd}\r", f"{cmd}\r") if value is None else \
-                       (f"{cmd} {value}\r", f"{cmd}: {value}\r")
-        return bool(self._compare(cmd, pattern))
+        if not (command := self.commands.get(cmd) or self.commands.get(cmd.upper())):
+            msg = f"Unknown command {cmd.upper()}"
+            raise LaserProtocolError(msg)
+
+        if command.reply is not None:
+            return command.request, command.reply, command.convert      # type: ignore
+
+        value = command.type(value)                                     # type: ignore
+        return f"{command.name} {value}\r", f"{command.name}: {value}\r", None
+
+    @staticmethod
+    def _response(answer: str, reply: Pattern[str] | str, convert: Callable | None) -> float | str | bool:
+        """Сравнение ответа устройства с ожидаемым.
+
+        Для команд 'set' reply - строка ожидаемого ответа, для команд 'get' -
+        регулярное выражение, значение из которого передается в convert.
+        """
+
+        if convert is None:
+            if reply in answer:                                         # type: ignore
+                return True
+        elif match := reply.search(answer):                             # type: ignore
+            return convert(match[1])
+        raise LaserProtocolError(answer)
 
-    def _get(self, cmd: str, frmt: object) -> float | str:
-        """Прочитать значение параметра."""
+    def _transact(self, cmd: str, packet: str, reply: Pattern[str] | str,
+                        convert: Callable | None) -> float | str | bool:
+        """Обмен с устройством и разбор ответа с учетом метрик."""
 
-        cmd, pattern = (f"{cmd}\r", f"{cmd}: (\\S+)\r")
-        return frmt(self._compare(cmd, pattern)[1])     # type: ignore
+        if (metrics := self.metrics) is None:
+            with self.lock:
+                answer = self._bus_exchange(packet)
+            return self._response(answer, reply, convert)
+
+        start = perf_counter()
+        try:
+            with self.lock:
+                answer = self._bus_exchange(packet)
+        except OSError as err:
+            metrics.failure(cmd, err)
+            raise
+        metrics.exchange(cmd, perf_counter() - start, len(packet), len(answer))
+
+        try:
+            return self._response(answer, reply, convert)
+        except LaserProtocolError:
+            metrics.protocol_error(cmd)
+            raise
 
     def send(self, cmd: str, value: float | str | None = None) -> float | str | bool:
         """Послать команду в устройство."""
 
+        packet, reply, convert = self._request(cmd, value)
+        if (cache := self.cache) is None and self.metrics is None:
+            with self.lock:
+                answer = self._bus_exchange(packet)
+            return self._response(answer, reply, convert)
+
         cmd = cmd.upper()
-        if not (device_info := self.device.get(cmd)):
-            msg = f"Unknown command {cmd}"
-            raise LaserProtocolError(msg)
+        if cache is None:
+            return self._transact(cmd, packet, reply, convert)
+
+        with self.lock:                     # чтение не может сохранить значение, устаревшее после записи
+            if convert is None:
+                try:
+                    return self._transact(cmd, packet, reply, convert)
+                finally:
+                    cache.invalidate(cmd)
+
+            if (result := cache.get(cmd)) is _MISSING:
+                result = self._transact(cmd, packet, reply, convert)
+                cache.put(cmd, result)
+            return result                                               # type: ignore
+
+    @staticmethod
+    def _demultiplex(names: list[str], answers: list[str]) -> list[str]:
+        """Сопоставление ответов с командами по эхо команды в начале ответа.
+
+        Ответ, не содержащий эхо ни одной из ожидающих команд (например,
+        сообщение об ошибке), относится к самой ранней неотвеченной команде.
+        """
+
+        pending: dict[str, deque[int]] = {}
+        for index, name in enumerate(names):
+            pending.setdefault(name, deque()).append(index)
+
+        ordered = [""] * len(names)
+        for answer in answers:
+            if not (queue := pending.get(answer.split(":", 1)[0].rstrip("\r"))):
+                queue = min((queue for queue in pending.values() if queue),
+                            key=lambda queue: queue[0], default=None)
+                if queue is None:
+                    break
+            ordered[queue.popleft()] = answer
+        return ordered
+
+    def send_many(self, commands: Iterable[tuple[str, float | str | None]]) -> list[float | str | bool]:
+        """Послать несколько команд в устройство одним пакетом.
+
+        Кадры всех команд записываются подряд, после чего принимаются все
+        ответы. Если хотя бы одна команда завершилась ошибкой, исключение
+        LaserProtocolError возбуждается после приема всех ответов.
+        """
+
+        names, requests = [], []
+        for cmd, value in commands:
+            requests.append(self._request(cmd, value))
+            names.append(cmd.upper())
+        if not requests:
+            return []
+
+        cache, metrics = self.cache, self.metrics
+        results, error = [], None
+        with self.lock:                     # обмен и обновление кэша выполняются атомарно
+            try:
+                packet = "".join(packet for packet, _, _ in requests)
+                if metrics is None:
+                    answers = self._bus_exchange_many(packet, len(requests))
+                else:
+                    start = perf_counter()
+                    try:
+                        answers = self._bus_exchange_many(packet, len(requests))
+                    except OSError as err:
+                        metrics.failure("BATCH", err)
+                        raise
+                    metrics.exchange("BATCH", perf_counter() - start, len(packet), sum(map(len, answers)))
+
+                for name, answer, (_, reply, convert) in zip(names, self._demultiplex(names, answers), requests):
+                    try:
+                        results.append(result := self._response(answer, reply, convert))
+                    except LaserProtocolError as err:
+                        error = error or err
+                        if metrics is not None:
+                            metrics.protocol_error(name)
+                    else:
+                        if cache is not None and convert is not None:
+                            cache.put(name, result)
+            finally:
+                if cache is not None:
+                    for name, (_, _, convert) in zip(names, requests):
+                        if convert is None:
+                            cache.invalidate(name)
+        if error:
+            raise error
+        return results
+
+    def subscribe(self, cmd: str, callback: Callable[[str, float | str], object],
+                        deadband: float = 0.0, interval: float = 1.0) -> Subscription:
+        """Подписка на изменения параметра.
 
-        frmt = device_info["type"]
-        func = device_info["func"]
+        Все подписки соединения опрашиваются общим планировщиком, который
+        объединяет их в минимальное число обменов. callback(cmd, value)
+        вызывается только при изменении значения больше чем на deadband.
+        """
 
-        return {"set": lambda: self._set(cmd, frmt(value) if frmt else None),
-                "get": lambda: self._get(cmd, frmt),
-               }[func]()                                # type: ignore
+        if self.scheduler is None:
+            from .subscription import SubscriptionScheduler
+            self.scheduler = SubscriptionScheduler(self)
+        return self.scheduler.subscribe(cmd, callback, deadband, interval)
 
 
-__all__ = ["Protocol"]
+__all__ = ["Protocol", "ResponseCache"]
@@ -0,0 +1,212 @@
+#! /usr/bin/env python3
+
+"""Фоновый опрос телеметрии лазера с хранением истории в кольцевых буферах."""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import TYPE_CHECKING, Iterable
+
+from .protocol import LaserProtocolError
+
+if TYPE_CHECKING:
+    from .protocol import Protocol
+    from .telemetry import TelemetryRecorder
+
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+
+class RingBuffer:
+    """Кольцевой буфер фиксированного размера на основе array.
+
+    Каждое значение записывается дважды (в ячейки pos и pos + size), поэтому
+    любые последние count значений лежат в памяти непрерывно и возвращаются
+    методом view как memoryview без копирования (например, для numpy.asarray).
+    """
+
+    def __init__(self, size: int, typecode: str = "d") -> None:
+        """Выделение памяти под буфер заданного размера."""
+
+        self.size = size
+        self.data = array(typecode, [0]) * (2 * size)
+        self.pos = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, value: float) -> None:
+        """Добавление значения с вытеснением самого старого."""
+
+        self.data[self.pos] = self.data[self.pos + self.size] = value
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def view(self, count: int | None = None) -> memoryview:
+        """Последние count значений в хронологическом порядке без копирования.
+
+        Представление живое: оно ссылается на память буфера, а не на снимок.
+        После заполнения буфера следующий append перезаписывает первый
+        элемент ранее полученного представления полного размера.
+        """
+
+        count = self.count if count is None else min(count, self.count)
+        end = self.pos + self.size
+        return memoryview(self.data)[end - count:end]
+
+
+class TelemetrySampler:
+    """Фоновый опрос числовых параметров устройства с заданным периодом.
+
+    По умолчанию опрашиваются все команды 'get' таблицы устройства с
+    числовым типом значения. Если клиент поддерживает пакетный обмен
+    (send_many), все параметры читаются за один обмен. История каждого
+    параметра и общие метки времени хранятся в кольцевых буферах.
+
+    Опрос выполняется под блокировкой обмена клиента (Protocol.lock), так
+    что обмены других потоков не вклиниваются между командами одного опроса.
+    """
+
+    def __init__(self, client: Protocol, commands: Iterable[str] | None = None,
+                       interval: float = 1.0, size: int = 3600,
+                       recorder: TelemetryRecorder | None = None) -> None:
+        """Инициализация опроса для клиента и списка команд.
+
+        Если задан recorder, каждый опрос дополнительно записывается в журнал.
+        """
+
+        if commands is None:
+            commands = [name for name, command in client.commands.items()
+                        if command.func == "get" and command.type in (int, float)]
+
+        self.commands = []
+        for cmd in commands:
+            if not (command := client.commands.get(cmd.upper())):
+                msg = f"Unknown command {cmd.upper()}"
+                raise LaserProtocolError(msg)
+            if command.func != "get" or command.type not in (int, float):
+                msg = f"Command {command.name} does not return a numeric value"
+                raise LaserProtocolError(msg)
+            self.commands.append(command.name)
+
+        self.client = client
+        self.interval = interval
+        self.requests = [(cmd, None) for cmd in self.commands]
+        self.channels = {cmd: RingBuffer(size) for cmd in self.commands}
+        self.timestamps = RingBuffer(size)
+        self.recorder = recorder
+        self.errors = 0
+        self.batched = True
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> TelemetrySampler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Запуск фонового опроса."""
+
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="TelemetrySampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановка фонового опроса."""
+
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        """Цикл опроса с периодом, не накапливающим погрешность."""
+
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as err:
+                self.errors += 1
+                _logger.debug("Telemetry sample failed: %r", err)
+
+            deadline += self.interval
+            if (delay := deadline - time.monotonic()) < 0:
+                deadline, delay = time.monotonic(), 0
+            self._stop.wait(delay)
+
+    def sample(self) -> dict[str, float]:
+        """Однократный опрос всех параметров и запись значений в буферы."""
+
+        with self.client.lock:
+            timestamp = time.time()
+            if self.batched:
+                try:
+                    values = self.client.send_many(self.requests)
+                except NotImplementedError:
+                    self.batched = False
+            if not self.batched:
+                values = [self.client.send(cmd) for cmd in self.commands]
+
+        with self._lock:
+            for cmd, value in zip(self.commands, values):
+                self.channels[cmd].append(value)            # type: ignore
+            self.timestamps.append(timestamp)
+        result = dict(zip(self.commands, values))
+        if self.recorder:
+            self.recorder.write(result, timestamp)          # type: ignore
+        return result                                       # type: ignore
+
+    def window(self, cmd: str, count: int | None = None) -> memoryview:
+        """Последние count значений параметра без копирования."""
+
+        return self.channels[cmd.upper()].view(count)
+
+    def times(self, count: int | None = None) -> memoryview:
+        """Метки времени последних count опросов без копирования."""
+
+        return self.timestamps.view(count)
+
+    def latest(self) -> dict[str, float]:
+        """Последние значения всех параметров."""
+
+        return {cmd: channel.view(1)[0] for cmd, channel in self.channels.items() if len(channel)}
+
+    def aggregate(self, cmd: str, period: float,
+                        count: int | None = None) -> list[tuple[float, float, float, float]]:
+        """Прореживание истории параметра: (начало интервала, min, max, mean) для каждого интервала period."""
+
+        with self._lock:                                    # согласованный снимок значений и меток времени
+            values = self.window(cmd, count).tolist()
+            times = self.times(len(values)).tolist()
+
+        result: list[tuple[float, float, float, float]] = []
+        start = low = high = total = math.nan
+        number = 0
+        for timestamp, value in zip(times, values):
+            if number and timestamp < start + period:
+                low, high, total, number = min(low, value), max(high, value), total + value, number + 1
+                continue
+            if number:
+                result.append((start, low, high, total / number))
+            start = timestamp - (timestamp - times[0]) % period
+            low = high = total = value
+            number = 1
+        if number:
+            result.append((start, low, high, total / number))
+        return result
+
+
+__all__ = ["RingBuffer", "TelemetrySampler"]
@@ -0,0 +1,145 @@
+#! /usr/bin/env python3
+
+"""Выполнение программ (рецептов) изменения параметров лазера по расписанию."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Union
+
+from .device import SETTER_GETTER, compile_device
+from .protocol import LaserProtocolError
+
+if TYPE_CHECKING:
+    from .device import LASER_DEVICE
+    from .protocol import Protocol
+
+
+class Step(NamedTuple):
+    """Шаг рецепта: время от начала программы (с), команда и значение."""
+
+    at: float
+    cmd: str
+    value: float | str | None = None
+
+
+class StepReport(NamedTuple):
+    """Результат выполнения шага."""
+
+    step: Step
+    sent: float             # фактическое время отправки от начала программы, с
+    late: float             # опоздание относительно расписания, с
+    duration: float         # длительность обмена, с
+    skipped: bool           # шаг пропущен: значение параметра не изменилось
+    result: float | str | bool | None
+
+
+RECIPE_STEP = Union[Step, tuple, dict]
+
+
+def load_recipe(recipe: Iterable[RECIPE_STEP], device: LASER_DEVICE) -> list[Step]:
+    """Приведение рецепта к списку шагов и проверка по таблице настроек устройства.
+
+    Шаг задается объектом Step, кортежем (at, cmd[, value]) или словарем
+    {"at": ..., "cmd": ..., "value": ...}. Значения приводятся к типу
+    аргумента команды.
+    """
+
+    commands = compile_device(device)
+    steps: list[Step] = []
+    for index, item in enumerate(recipe):
+        try:
+            step = Step(**item) if isinstance(item, dict) else Step(*item)
+            at, name = float(step.at), step.cmd.upper()
+        except (TypeError, ValueError, AttributeError):
+            msg = f"Step {index}: invalid step {item!r}"
+            raise LaserProtocolError(msg) from None
+        if not (command := commands.get(name)):
+            msg = f"Step {index}: unknown command {name}"
+            raise LaserProtocolError(msg)
+        if at < 0 or (steps and at < steps[-1].at):
+            msg = f"Step {index}: time {at} is negative or out of order"
+            raise LaserProtocolError(msg)
+
+        value = step.value
+        if command.func == "set" and command.type is not None:
+            try:
+                value = command.type(value)                 # type: ignore
+            except (TypeError, ValueError):
+                msg = f"Step {index}: invalid value {value!r} for {command.name}"
+                raise LaserProtocolError(msg) from None
+        elif value is not None:
+            msg = f"Step {index}: command {command.name} takes no value"
+            raise LaserProtocolError(msg)
+
+        steps.append(Step(at, command.name, value))
+    return steps
+
+
+class SequenceRunner:
+    """Выполнение рецептов на клиенте с компенсацией задержек планирования.
+
+    Моменты отправки отсчитываются от абсолютного времени начала программы,
+    поэтому задержки отдельных шагов не накапливаются. Ожидание выполняется
+    через sleep до момента spin перед отправкой, остаток - активным
+    ожиданием. Команды записи, значение которых совпадает с последним
+    записанным (или прочитанным при prime), пропускаются.
+    """
+
+    def __init__(self, client: Protocol, spin: float = 0.002) -> None:
+        """Инициализация исполнителя для клиента."""
+
+        self.client = client
+        self.spin = spin
+        self.values: dict[str, float | str] = {}
+
+    def prime(self, steps: Iterable[Step]) -> None:
+        """Чтение текущих значений параметров, изменяемых рецептом."""
+
+        for cmd in {step.cmd for step in steps if step.value is not None}:
+            if (getter := SETTER_GETTER.get(cmd)) and getter in self.client.commands:
+                self.values[cmd] = self.client.send(getter)         # type: ignore
+
+    def _wait(self, deadline: float) -> None:
+        if (delay := deadline - time.perf_counter() - self.spin) > 0:
+            time.sleep(delay)
+        while time.perf_counter() < deadline:
+            pass
+
+    def _unchanged(self, step: Step) -> bool:
+        if step.value is None or step.cmd not in self.values:
+            return False
+        value = self.values[step.cmd]
+        if isinstance(step.value, (int, float)):            # сравнение в типе ответа команды чтения
+            try:
+                return float(step.value) == float(value)    # type: ignore
+            except (TypeError, ValueError):
+                return False
+        return str(step.value) == str(value)
+
+    def run(self, recipe: Iterable[RECIPE_STEP], prime: bool = False) -> list[StepReport]:
+        """Выполнение рецепта. Возвращает отчет по каждому шагу."""
+
+        steps = load_recipe(recipe, self.client.device)
+        if prime:
+            self.prime(steps)
+
+        reports = []
+        start = time.perf_counter()
+        for step in steps:
+            self._wait(start + step.at)
+            sent = time.perf_counter() - start
+
+            if self._unchanged(step):
+                reports.append(StepReport(step, sent, sent - step.at, 0.0, True, None))
+                continue
+
+            result = self.client.send(step.cmd, step.value)
+            duration = time.perf_counter() - start - sent
+            if step.value is not None:
+                self.values[step.cmd] = step.value
+            reports.append(StepReport(step, sent, sent - step.at, duration, False, result))
+        return reports
+
+
+__all__ = ["SequenceRunner", "Step", "StepReport", "load_recipe"]
@@ -0,0 +1,283 @@
+#! /usr/bin/env python3
+
+"""Асинхронный симулятор множества виртуальных лазеров для нагрузочного тестирования."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Awaitable, Coroutine
+
+from .device import RFL_C3000S, SETTER_GETTER, STATUS_BITS, compile_device
+
+if TYPE_CHECKING:
+    from .device import LASER_DEVICE
+
+# начальные значения параметров виртуального лазера
+DEFAULTS = {"SPW": 0,
+            "SPRR": 0,
+            "SDC": 0,
+            "SIP": "127.0.0.1",
+            "SMASK": "255.0.0.0",
+            "SDGW": "127.0.0.1",
+            "SUT": 0,
+            "SDT": 0,
+            "PSRT": 0,
+            "RBT": 36.6,
+            "RCT": 34.5,
+            "ROP": 4000.4,
+            "RSN": 221200251,
+            "STA": 0,
+           }
+
+# команды, изменяющие биты статуса: номер бита и новое значение (см. STATUS_BITS)
+SWITCHES = {"EMON": (STATUS_BITS["laser_enabled"], True),
+            "EMOFF": (STATUS_BITS["laser_enabled"], False),
+            "EEC": (STATUS_BITS["external_control"], True),
+            "DEC": (STATUS_BITS["external_control"], False),
+            "ABN": (STATUS_BITS["aiming_beam"], True),
+            "ABF": (STATUS_BITS["aiming_beam"], False),
+            "MPWRON": (STATUS_BITS["main_power"], True),
+            "MPWROFF": (STATUS_BITS["main_power"], False),
+            "EGM": (STATUS_BITS["gate_mode"], True),
+            "DGM": (STATUS_BITS["gate_mode"], False),
+            "ELE": (STATUS_BITS["external_enable"], True),
+            "DLE": (STATUS_BITS["external_enable"], False),
+            "PSRT": (STATUS_BITS["programming_mode"], True),
+            "PSTP": (STATUS_BITS["programming_mode"], False),
+            "EEABC": (STATUS_BITS["external_aiming_beam"], True),
+            "DEABC": (STATUS_BITS["external_aiming_beam"], False),
+            "PERR": (STATUS_BITS["critical_error"], False),
+            "RERR": (STATUS_BITS["critical_error"], False),
+           }
+
+GETTER_SETTER = {getter: setter for setter, getter in SETTER_GETTER.items()}
+
+
+class VirtualLaser:
+    """Виртуальный лазер с собственным состоянием и внесением неисправностей.
+
+    latency - задержка ответа, jitter - верхняя граница случайной добавки к
+    задержке, drop - вероятность потери ответа (в секундах и долях единицы).
+    """
+
+    def __init__(self, device: LASER_DEVICE = RFL_C3000S, latency: float = 0.0,
+                       jitter: float = 0.0, drop: float = 0.0,
+                       rng: random.Random | None = None) -> None:
+        """Инициализация состояния по таблице настроек устройства."""
+
+        self.commands = compile_device(device)
+        self.latency = latency
+        self.jitter = jitter
+        self.drop = drop
+        self.rng = rng or random.Random()
+        self.requests = 0
+        self.dropped = 0
+
+        self.storage: dict[str, object] = {}
+        for name, command in self.commands.items():
+            key = GETTER_SETTER.get(name, name)
+            default = {int: 0, float: 0.0, str: "0"}.get(command.type, 0)    # type: ignore
+            self.storage.setdefault(key, DEFAULTS.get(key, DEFAULTS.get(name, default)))
+        self.storage["STA"] = DEFAULTS["STA"]
+
+    def process(self, frame: str) -> str:
+        """Обработка кадра запроса и формирование ответа."""
+
+        name, _, arg = frame.rstrip("\r").partition(" ")
+        if not (command := self.commands.get(name)):
+            return "BCMD\r"
+
+        if command.func == "get":
+            return f"{name}: {self.storage[GETTER_SETTER.get(name, name)]}\r"
+
+        if command.type is not None:
+            try:
+                command.type(arg)                           # type: ignore
+            except ValueError:
+                return "BCMD\r"
+            self.storage[name] = arg
+
+        if switch := SWITCHES.get(name):
+            bit, state = switch
+            status: int = self.storage["STA"]               # type: ignore
+            self.storage["STA"] = status | 1 << bit if state else status & ~(1 << bit)
+
+        return f"{name}: {arg}\r" if command.type is not None else f"{name}\r"
+
+    def delay(self) -> float:
+        """Задержка очередного ответа."""
+
+        return self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def lost(self) -> bool:
+        """Признак потери очередного ответа."""
+
+        if self.drop and self.rng.random() < self.drop:
+            self.dropped += 1
+            return True
+        return False
+
+    async def answer(self, frame: str) -> str | None:
+        """Ответ на кадр запроса с учетом задержки и потерь."""
+
+        self.requests += 1
+        answer = self.process(frame)
+        if delay := self.delay():
+            await asyncio.sleep(delay)
+        return None if self.lost() else answer
+
+
+class _UdpLaser(asyncio.DatagramProtocol):
+    """Обслуживание виртуального лазера по протоколу UDP."""
+
+    def __init__(self, laser: VirtualLaser, tasks: set[asyncio.Task]) -> None:
+        self.laser = laser
+        self.tasks = tasks                                  # задачи отложенных ответов
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport                          # type: ignore
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        for frame in data.decode("ascii").rstrip("\r").split("\r"):
+            if self.laser.latency or self.laser.jitter:
+                task = asyncio.ensure_future(self._reply(frame, addr))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            else:
+                self.laser.requests += 1
+                answer = self.laser.process(frame)
+                if not self.laser.lost():
+                    self.transport.sendto(answer.encode("ascii"), addr)     # type: ignore
+
+    async def _reply(self, frame: str, addr: tuple[str, int]) -> None:
+        if (answer := await self.laser.answer(frame)) is not None and self.transport:
+            self.transport.sendto(answer.encode("ascii"), addr)
+
+
+class LaserSimulator:
+    """Симулятор множества виртуальных лазеров, каждый на своем порту.
+
+    Может работать в текущем цикле событий (методы add_tcp, add_udp, close)
+    или в отдельном потоке (start, run, stop), например внутри тестов и
+    бенчмарков.
+    """
+
+    def __init__(self, host: str = "127.0.0.1") -> None:
+        """Инициализация симулятора на заданном адресе."""
+
+        self.host = host
+        self.lasers: dict[tuple[str, int], VirtualLaser] = {}
+        self.servers: list[asyncio.AbstractServer] = []
+        self.transports: list[asyncio.BaseTransport] = []
+        self.writers: set[asyncio.StreamWriter] = set()
+        self.tasks: set[asyncio.Task] = set()               # обработчики соединений и отложенные ответы
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    async def _serve_tcp(self, laser: VirtualLaser, reader: asyncio.StreamReader,
+                                           writer: asyncio.StreamWriter) -> None:
+        """Обслуживание одного TCP-соединения."""
+
+        self.writers.add(writer)
+        if task := asyncio.current_task():
+            self.tasks.add(task)
+        try:
+            # отмена при остановке симулятора завершает обработчик штатно
+            with contextlib.suppress(asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+                while True:
+                    frame = await reader.readuntil(b"\r")
+                    if (answer := await laser.answer(frame.decode("ascii"))) is not None:
+                        writer.write(answer.encode("ascii"))
+        finally:
+            self.writers.discard(writer)
+            self.tasks.discard(task)                        # type: ignore
+            writer.close()
+
+    async def add_tcp(self, laser: VirtualLaser, port: int = 0) -> int:
+        """Запуск TCP-сервера виртуального лазера. Возвращает номер порта."""
+
+        server = await asyncio.start_server(lambda reader, writer: self._serve_tcp(laser, reader, writer),
+                                            self.host, port, reuse_address=True)
+        port = server.sockets[0].getsockname()[1]
+        self.servers.append(server)
+        self.lasers[("TCP", port)] = laser
+        return port
+
+    async def add_udp(self, laser: VirtualLaser, port: int = 0) -> int:
+        """Запуск UDP-сервера виртуального лазера. Возвращает номер порта."""
+
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(lambda: _UdpLaser(laser, self.tasks),
+                                                           local_addr=(self.host, port))
+        port = transport.get_extra_info("sockname")[1]
+        self.transports.append(transport)
+        self.lasers[("UDP", port)] = laser
+        return port
+
+    async def close(self) -> None:
+        """Остановка всех серверов."""
+
+        for server in self.servers:
+            server.close()
+        for writer in list(self.writers):
+            writer.close()
+        tasks = [task for task in self.tasks if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        for transport in self.transports:
+            transport.close()
+        self.servers.clear()
+        self.transports.clear()
+        self.lasers.clear()
+
+    def start(self) -> None:
+        """Запуск цикла событий симулятора в отдельном потоке."""
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="LaserSimulator", daemon=True)
+        self._thread.start()
+
+    def run(self, coro: Coroutine | Awaitable) -> object:
+        """Выполнение сопрограммы в цикле событий потока симулятора."""
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()   # type: ignore
+
+    def stop(self) -> None:
+        """Остановка серверов и потока симулятора."""
+
+        if self.loop and self._thread:
+            self.run(self.close())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join()
+            self.loop.close()
+            self.loop = self._thread = None
+
+
+def serve_serial(laser: VirtualLaser, address: str) -> None:
+    """Обслуживание виртуального лазера через последовательный порт (блокирующее)."""
+
+    from serial import Serial     # pyserial нужен только для симуляции порта RS-232
+
+    port = Serial(port=address, timeout=1.0)
+    try:
+        while True:
+            if frame := port.read_until(b"\r"):
+                laser.requests += 1
+                answer = laser.process(frame.decode("ascii"))
+                if delay := laser.delay():
+                    time.sleep(delay)
+                if not laser.lost():
+                    port.write(answer.encode("ascii"))
+    finally:
+        port.close()
+
+
+__all__ = ["LaserSimulator", "VirtualLaser", "serve_serial"]
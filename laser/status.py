@@ -0,0 +1,127 @@
+#! /usr/bin/env python3
+
+"""Разбор слова состояния лазера (команда STA) и обнаружение изменений флагов.
+
+Все операции выполняются поразрядными операциями над целыми числами, поэтому
+одни и те же методы применимы и к одиночному значению, и к массивам numpy
+значений STA (например, по множеству лазеров или по времени) без циклов на
+Python. Без numpy последовательности обрабатываются поэлементно.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+from .device import DEVICE_STATUS, STATUS_BITS
+
+try:
+    import numpy as np
+except ImportError:             # numpy необязателен: без него массивы обрабатываются поэлементно
+    np = None
+
+# флаги, установка которых считается аварией
+ALARM_RAISED = ("overheat", "high_back_reflection", "slave_communication_abnormal", "error",
+                "low_temperature", "humidity_alarm", "water_flow_alarm", "water_flow_alarm_2",
+                "critical_error", "optical_interlock", "average_power_high")
+
+# флаги, сброс которых считается аварией
+ALARM_CLEARED = ("laser_enabled", "emitting")
+
+
+class StatusModel:
+    """Модель слова состояния: именованные флаги и их маски."""
+
+    def __init__(self, bits: dict[str, int] = STATUS_BITS) -> None:
+        """Инициализация модели по таблице битов состояния."""
+
+        self.bits = dict(bits)
+        self.masks = {name: 1 << bit for name, bit in self.bits.items()}
+        self.raised_mask = self.mask(*(name for name in ALARM_RAISED if name in self.bits))
+        self.cleared_mask = self.mask(*(name for name in ALARM_CLEARED if name in self.bits))
+
+    @classmethod
+    def for_device(cls, name: str) -> StatusModel:
+        """Модель для таблицы настроек устройства по ее названию (см. device.py)."""
+
+        return cls(DEVICE_STATUS.get(name, STATUS_BITS))
+
+    def mask(self, *names: str) -> int:
+        """Маска из нескольких флагов."""
+
+        result = 0
+        for name in names:
+            result |= self.masks[name]
+        return result
+
+    def test(self, value: int, name: str) -> bool:
+        """Проверка одного флага."""
+
+        return bool(value & self.masks[name])
+
+    def decode(self, value: int) -> dict[str, bool]:
+        """Значения всех флагов одного слова состояния."""
+
+        return {name: bool(value & mask) for name, mask in self.masks.items()}
+
+    def active(self, value: int) -> list[str]:
+        """Имена установленных флагов."""
+
+        return [name for name, mask in self.masks.items() if value & mask]
+
+    def decode_array(self, values: Iterable[int], names: Iterable[str] | None = None) -> dict[str, object]:
+        """Значения флагов для массива слов состояния.
+
+        При наличии numpy для каждого флага возвращается булев массив формы
+        values, иначе - список bool.
+        """
+
+        names = self.masks if names is None else names
+        if np is not None:
+            values = np.asarray(values, dtype=np.int64)
+            return {name: (values & self.masks[name]) != 0 for name in names}
+
+        values = [int(value) for value in values]
+        return {name: [bool(value & self.masks[name]) for value in values] for name in names}
+
+    @staticmethod
+    def changes(previous: object, current: object) -> tuple[object, object]:
+        """Установленные и сброшенные биты между двумя опросами.
+
+        previous и current - целые числа или массивы numpy одной формы
+        (например, STA всех лазеров на двух соседних опросах).
+        """
+
+        return ~previous & current, previous & ~current     # type: ignore
+
+    def transitions(self, samples: Sequence[int]) -> tuple[object, object]:
+        """Установленные и сброшенные биты между соседними отсчетами (по оси 0)."""
+
+        if np is not None:
+            samples = np.asarray(samples, dtype=np.int64)
+            return self.changes(samples[:-1], samples[1:])
+
+        samples = [int(value) for value in samples]
+        pairs = [self.changes(*pair) for pair in zip(samples, samples[1:])]
+        return [raised for raised, _ in pairs], [cleared for _, cleared in pairs]
+
+    def alarms(self, previous: object, current: object) -> object:
+        """Маска флагов, изменение которых является аварией.
+
+        Возвращается маска установленных аварийных флагов (ALARM_RAISED) и
+        сброшенных рабочих (ALARM_CLEARED); ненулевое значение - авария.
+        Для последовательностей результат - массив (список без numpy) масок.
+        """
+
+        if isinstance(previous, (int, float)):
+            previous, current = int(previous), int(current)         # type: ignore
+        elif np is not None:
+            previous = np.asarray(previous, dtype=np.int64)
+            current = np.asarray(current, dtype=np.int64)
+        else:
+            return [self.alarms(*pair) for pair in zip(previous, current)]   # type: ignore
+
+        raised, cleared = self.changes(previous, current)
+        return (raised & self.raised_mask) | (cleared & self.cleared_mask)  # type: ignore
+
+
+__all__ = ["ALARM_CLEARED", "ALARM_RAISED", "StatusModel"]
@@ -0,0 +1,191 @@
+#! /usr/bin/env python3
+
+"""Подписка на изменения параметров лазера с общим планировщиком опроса."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+from .protocol import _MISSING, LaserProtocolError
+
+if TYPE_CHECKING:
+    from .protocol import Protocol
+
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+
+class Subscription:
+    """Подписка на изменения одного параметра.
+
+    callback(cmd, value) вызывается при первом чтении и далее только при
+    изменении значения больше чем на deadband относительно последнего
+    переданного в callback (для нечисловых значений - при любом изменении).
+    """
+
+    def __init__(self, scheduler: SubscriptionScheduler, cmd: str,
+                       callback: Callable[[str, float | str], object],
+                       deadband: float, interval: float) -> None:
+        self.scheduler = scheduler
+        self.cmd = cmd
+        self.callback = callback
+        self.deadband = deadband
+        self.interval = interval
+        self.deadline = 0.0
+        self.value: object = _MISSING
+
+    def cancel(self) -> None:
+        """Отмена подписки."""
+
+        self.scheduler.remove(self)
+
+    def update(self, value: float | str) -> bool:
+        """Учет нового значения. Возвращает True, если вызван callback."""
+
+        if (last := self.value) is not _MISSING:
+            try:
+                if abs(value - last) <= self.deadband:      # type: ignore
+                    return False
+            except TypeError:
+                if value == last:
+                    return False
+        self.value = value
+        self.callback(self.cmd, value)
+        return True
+
+
+class SubscriptionScheduler:
+    """Общий планировщик опроса подписок одного соединения.
+
+    Подписки, срок опроса которых наступил, а также подписки, срок которых
+    наступит в пределах доли slack их периода, опрашиваются вместе одним
+    пакетным обменом (send_many), каждая команда - один раз. Опрос
+    выполняется фоновым потоком, который завершается после отмены последней
+    подписки; callback вызываются из этого потока. Обмены планировщика и
+    других потоков разделяются блокировкой обмена клиента (Protocol.lock).
+    """
+
+    def __init__(self, client: Protocol, slack: float = 0.25) -> None:
+        """Инициализация планировщика для клиента."""
+
+        self.client = client
+        self.slack = slack
+        self.subscriptions: list[Subscription] = []
+        self.exchanges = 0
+        self.errors = 0
+        self.batched = True
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, cmd: str, callback: Callable[[str, float | str], object],
+                        deadband: float = 0.0, interval: float = 1.0) -> Subscription:
+        """Добавление подписки на команду чтения."""
+
+        if not (command := self.client.commands.get(cmd.upper())):
+            msg = f"Unknown command {cmd.upper()}"
+            raise LaserProtocolError(msg)
+        if command.func != "get":
+            msg = f"Command {command.name} is not a read command"
+            raise LaserProtocolError(msg)
+
+        subscription = Subscription(self, command.name, callback, deadband, interval)
+        with self._lock:
+            subscription.deadline = time.monotonic()
+            self.subscriptions.append(subscription)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="SubscriptionScheduler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return subscription
+
+    def remove(self, subscription: Subscription) -> None:
+        """Удаление подписки."""
+
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+        self._wake.set()
+
+    def stop(self) -> None:
+        """Отмена всех подписок и остановка потока опроса."""
+
+        with self._lock:
+            self.subscriptions.clear()
+            thread = self._thread
+        self._wake.set()
+        if thread and thread is not threading.current_thread():
+            thread.join()
+
+    def _exchange(self, commands: list[str]) -> dict[str, float | str]:
+        """Чтение значений команд: одним пакетом, если клиент это поддерживает."""
+
+        if self.batched:
+            try:
+                values = self.client.send_many([(cmd, None) for cmd in commands])
+                self.exchanges += 1
+                return dict(zip(commands, values))          # type: ignore
+            except NotImplementedError:
+                self.batched = False
+            except LaserProtocolError:
+                pass                                        # повтор по одной, чтобы выделить ошибочную
+
+        values = {}
+        for cmd in commands:
+            try:
+                values[cmd] = self.client.send(cmd)
+            except LaserProtocolError as err:
+                self.errors += 1
+                _logger.debug("Subscription poll of %s failed: %r", cmd, err)
+            self.exchanges += 1
+        return values                                       # type: ignore
+
+    def poll(self, now: float) -> float | None:
+        """Опрос подписок, срок которых наступил. Возвращает срок следующего опроса."""
+
+        with self._lock:
+            subscriptions = list(self.subscriptions)
+        if not subscriptions:
+            return None
+
+        if any(item.deadline <= now for item in subscriptions):
+            due = [item for item in subscriptions if item.deadline - self.slack * item.interval <= now]
+            try:
+                values = self._exchange(list(dict.fromkeys(item.cmd for item in due)))
+            except OSError as err:
+                self.errors += 1
+                _logger.debug("Subscription poll failed: %r", err)
+                values = {}
+
+            for item in due:
+                item.deadline += item.interval
+                if item.deadline <= now:                    # пропуск опросов после задержки
+                    item.deadline = now + item.interval
+                if item.cmd in values:
+                    try:
+                        item.update(values[item.cmd])
+                    except Exception as err:
+                        self.errors += 1
+                        _logger.debug("Subscription callback for %s failed: %r", item.cmd, err)
+
+        return min(item.deadline for item in subscriptions)
+
+    def _run(self) -> None:
+        """Цикл опроса до отмены всех подписок."""
+
+        while True:
+            self._wake.clear()
+            if (deadline := self.poll(time.monotonic())) is None:
+                with self._lock:
+                    if not self.subscriptions:
+                        self._thread = None
+                        return
+                continue
+            self._wake.wait(max(0.0, deadline - time.monotonic()))
+
+
+__all__ = ["Subscription", "SubscriptionScheduler"]
@@ -0,0 +1,230 @@
+#! /usr/bin/env python3
+
+"""Двоичный журнал телеметрии лазера и его чтение через отображение в память.
+
+Формат файла:
+    * 8 байт - сигнатура b"LASERLOG";
+    * 4 байта - длина заголовка (little-endian), 4 байта - резерв;
+    * заголовок JSON (версия, имя и таблица настроек устройства, список
+      каналов), дополненный пробелами до границы 8 байт;
+    * записи фиксированной длины: метка времени и значения каналов,
+      все в формате float64 little-endian.
+
+Рядом с файлом пишется разреженный индекс (файл с суффиксом .idx): метка
+времени и номер записи для каждой index_every-й записи. Он позволяет
+найти интервал времени, не обращаясь ко всему файлу.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Iterable
+
+from .protocol import LaserProtocolError
+
+try:
+    import numpy as np
+except ImportError:             # numpy необязателен: без него каналы возвращаются копией в array
+    np = None
+
+if TYPE_CHECKING:
+    from .device import LASER_DEVICE
+
+MAGIC = b"LASERLOG"
+VERSION = 1
+PREFIX = struct.Struct("<8sII")
+INDEX = struct.Struct("<dQ")
+
+
+def _profile(device: LASER_DEVICE) -> dict[str, dict[str, str | None]]:
+    """Таблица настроек устройства в виде, пригодном для JSON."""
+
+    return {cmd: {"func": params["func"],
+                  "type": getattr(params["type"], "__name__", None)}
+            for cmd, params in device.items()}
+
+
+class TelemetryRecorder:
+    """Запись значений команд чтения в двоичный журнал."""
+
+    def __init__(self, path: str, device: LASER_DEVICE, channels: Iterable[str] | None = None,
+                       device_name: str = "", index_every: int = 1024) -> None:
+        """Создание файла журнала и запись заголовка.
+
+        По умолчанию записываются все команды 'get' с числовым типом значения.
+        """
+
+        if channels is None:
+            channels = [cmd for cmd, params in device.items()
+                        if params["func"] == "get" and params["type"] in (int, float)]
+
+        self.channels = [cmd.upper() for cmd in channels]
+        for cmd in self.channels:
+            params = device.get(cmd)
+            if not params or params["func"] != "get" or params["type"] not in (int, float):
+                msg = f"Command {cmd} does not return a numeric value"
+                raise LaserProtocolError(msg)
+
+        header = json.dumps({"version": VERSION, "device": device_name,
+                             "profile": _profile(device), "channels": self.channels}).encode()
+        header += b" " * (-len(header) % 8)
+
+        self.index_every = index_every
+        self.record = struct.Struct(f"<{len(self.channels) + 1}d")
+        self.count = 0
+        self.file = open(path, "wb")                        # noqa: SIM115
+        self.file.write(PREFIX.pack(MAGIC, len(header), 0) + header)
+        self.index = open(f"{path}.idx", "wb")              # noqa: SIM115
+
+    def __enter__(self) -> TelemetryRecorder:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def write(self, values: dict[str, float], timestamp: float | None = None) -> None:
+        """Запись значений каналов. Отсутствующие значения записываются как NaN."""
+
+        timestamp = time.time() if timestamp is None else timestamp
+        if not self.count % self.index_every:
+            self.index.write(INDEX.pack(timestamp, self.count))
+        self.file.write(self.record.pack(timestamp, *(values.get(cmd, float("nan"))
+                                                      for cmd in self.channels)))
+        self.count += 1
+
+    def flush(self) -> None:
+        """Сброс буферов записи на диск."""
+
+        self.file.flush()
+        self.index.flush()
+
+    def close(self) -> None:
+        """Закрытие журнала."""
+
+        self.file.close()
+        self.index.close()
+
+
+class TelemetryReader:
+    """Чтение двоичного журнала через отображение файла в память.
+
+    Файл не разбирается при открытии: читается только заголовок, а данные
+    каналов возвращаются как представления отображенной памяти (numpy) без
+    копирования. Поиск интервала времени использует разреженный индекс и
+    двоичный поиск внутри блока индекса.
+
+    Массивы numpy, возвращенные channel и times, ссылаются на отображение
+    файла: пока они существуют, close (и выход из контекстного менеджера)
+    не освобождает отображение, оно будет закрыто сборщиком мусора после
+    удаления последнего массива.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Открытие журнала и чтение заголовка."""
+
+        with open(path, "rb") as file:
+            magic, length, _ = PREFIX.unpack(file.read(PREFIX.size))
+            if magic != MAGIC:
+                msg = f"{path} is not a laser telemetry log"
+                raise LaserProtocolError(msg)
+            self.header = json.loads(file.read(length))
+            self.offset = PREFIX.size + length
+            size = os.fstat(file.fileno()).st_size
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.channels: list[str] = self.header["channels"]
+        self.device: str = self.header["device"]
+        self.profile: dict = self.header["profile"]
+        self.width = len(self.channels) + 1
+        self.record_size = 8 * self.width
+        self.count = (size - self.offset) // self.record_size
+
+        self.index: list[tuple[float, int]] = []
+        if os.path.exists(f"{path}.idx"):
+            with open(f"{path}.idx", "rb") as file:
+                self.index = [item for item in INDEX.iter_unpack(file.read()) if item[1] < self.count]
+        self.index_times = [timestamp for timestamp, _ in self.index]
+
+    def __enter__(self) -> TelemetryReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Закрытие отображения файла.
+
+        Если существуют массивы numpy, ссылающиеся на отображение, оно
+        остается открытым до их удаления.
+        """
+
+        try:
+            self.mmap.close()
+        except BufferError:
+            pass                    # отображение закроется после удаления последнего массива
+
+    def _timestamp(self, index: int) -> float:
+        return struct.unpack_from("<d", self.mmap, self.offset + index * self.record_size)[0]
+
+    def seek(self, timestamp: float, right: bool = False) -> int:
+        """Номер первой записи с меткой времени >= timestamp (> при right=True)."""
+
+        low, high = 0, self.count
+        if self.index:
+            block = (bisect_right if right else bisect_left)(self.index_times, timestamp)
+            if block > 0:
+                low = self.index[block - 1][1]
+            if block < len(self.index):
+                high = self.index[block][1]
+
+        while low < high:
+            middle = (low + high) // 2
+            value = self._timestamp(middle)
+            if value < timestamp or (right and value == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def records(self, start: float | None = None, end: float | None = None) -> slice:
+        """Диапазон записей с метками времени в интервале [start, end]."""
+
+        first = 0 if start is None else self.seek(start)
+        last = self.count if end is None else self.seek(end, right=True)
+        return slice(first, last)
+
+    def _column(self, column: int, rows: slice) -> object:
+        first, last, _ = rows.indices(self.count)
+        if np is not None:
+            table = np.frombuffer(self.mmap, dtype="<f8", count=self.count * self.width,
+                                  offset=self.offset).reshape(-1, self.width)
+            return table[first:last, column]
+
+        view = memoryview(self.mmap)[self.offset:self.offset + self.count * self.record_size].cast("d")
+        return array("d", view[first * self.width + column:last * self.width:self.width])
+
+    def times(self, start: float | None = None, end: float | None = None) -> object:
+        """Метки времени записей в интервале [start, end]."""
+
+        return self._column(0, self.records(start, end))
+
+    def channel(self, cmd: str, start: float | None = None, end: float | None = None) -> object:
+        """Значения канала в интервале [start, end].
+
+        При наличии numpy возвращается представление numpy.ndarray без
+        копирования, иначе - копия в array('d').
+        """
+
+        return self._column(self.channels.index(cmd.upper()) + 1, self.records(start, end))
+
+
+__all__ = ["TelemetryReader", "TelemetryRecorder"]
@@ -0,0 +1,382 @@
+#! /usr/bin/env python3
+
+"""Надежный обмен с лазерами по UDP: повторная передача и сопоставление ответов.
+
+Один сокет UdpTransport обслуживает любое число лазеров. Запросы к разным
+лазерам (и разные команды к одному лазеру) могут выполняться одновременно.
+Ответ сопоставляется с запросом по адресу отправителя и эхо команды в
+начале ответа. Ответы без ожидающего запроса (запоздавшие ответы на уже
+завершенные запросы) отбрасываются. Тайм-аут повторной передачи (RTO)
+вычисляется для каждого лазера по измеренному времени обмена (RTT) по
+правилам RFC 6298 с алгоритмом Карна: обмены с повторной передачей не
+участвуют в оценке RTT.
+
+Протокол лазера не содержит номеров запросов, поэтому запоздавший ответ на
+повторно переданный запрос неотличим от ответа на новый запрос той же
+команды к тому же лазеру. Для команд записи со значением ответ сверяется
+целиком, для остальных команд - только по имени команды.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from socket import AF_INET, SOCK_DGRAM, socket
+from socket import timeout as socket_timeout
+from time import perf_counter
+from typing import TYPE_CHECKING, Collection, Iterable
+
+from .protocol import LaserProtocolError, Protocol
+
+if TYPE_CHECKING:
+    from .device import LASER_DEVICE
+
+_logger = logging.getLogger(__name__)
+_logger.addHandler(logging.NullHandler())
+
+
+class RttEstimator:
+    """Оценка RTT и тайм-аута повторной передачи (RFC 6298).
+
+    backed_off - момент последнего удвоения RTO: тайм-ауты запросов,
+    отправленных до него, повторно RTO не удваивают.
+    """
+
+    def __init__(self, initial: float = 0.1, minimum: float = 0.005, maximum: float = 1.0) -> None:
+        """Инициализация оценки с начальным значением RTO."""
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.rto = initial
+        self.backed_off = float("-inf")
+
+    def sample(self, rtt: float) -> None:
+        """Учет измеренного времени обмена."""
+
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.rto = min(self.maximum, max(self.minimum, self.srtt + 4 * self.rttvar))
+
+    def backoff(self, now: float) -> None:
+        """Удвоение RTO после тайм-аута."""
+
+        self.rto = min(self.maximum, self.rto * 2)
+        self.backed_off = now
+
+
+class UdpRequest:
+    """Ожидающий ответа запрос."""
+
+    __slots__ = ("address", "answer", "expect", "name", "packet", "resend", "sent", "start", "transmissions")
+
+    def __init__(self, address: tuple[str, int], packet: str, expect: str | None) -> None:
+        self.address = address
+        self.packet = packet.encode("ascii")
+        self.name = packet.split(" ", 1)[0].rstrip("\r")
+        self.expect = expect
+        self.answer: str | None = None
+        self.start = self.sent = self.resend = 0.0
+        self.transmissions = 0
+
+
+class UdpTransport:
+    """Общий UDP-сокет для обмена с несколькими лазерами.
+
+    Прием выполняется фоновым потоком, который сопоставляет ответы с
+    ожидающими запросами; повторную передачу выполняет поток, ожидающий
+    ответа. timeout - общее время ожидания ответа на запрос с учетом
+    повторов, retries - максимальное число повторных передач.
+    """
+
+    def __init__(self, bind: tuple[str, int] = ("0.0.0.0", 0), timeout: float = 1.0,
+                       retries: int = 5, initial_rto: float = 0.1, min_rto: float = 0.005) -> None:
+        """Создание сокета и запуск потока приема."""
+
+        self.timeout = timeout
+        self.retries = retries
+        self.initial_rto = initial_rto
+        self.min_rto = min_rto
+        self.estimators: dict[tuple[str, int], RttEstimator] = {}
+        self.known: dict[tuple[str, int], Collection[str]] = {}
+        self.pending: dict[tuple[str, int], list[UdpRequest]] = {}
+        self.condition = threading.Condition()
+
+        self.sent = 0
+        self.retransmits = 0
+        self.timeouts = 0
+        self.stale = 0
+
+        self.socket = socket(AF_INET, SOCK_DGRAM)
+        self.socket.bind(bind)
+        self.socket.settimeout(0.2)
+        self._closed = False
+        self._thread = threading.Thread(target=self._receive, name="UdpTransport", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> UdpTransport:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Остановка потока приема и закрытие сокета."""
+
+        if not self._closed:
+            self._closed = True
+            self._thread.join()
+            self.socket.close()
+
+    def register(self, address: tuple[str, int], names: Collection[str]) -> None:
+        """Регистрация имен команд лазера для распознавания устаревших ответов."""
+
+        self.known[address] = names
+
+    def estimator(self, address: tuple[str, int]) -> RttEstimator:
+        """Оценка RTT для адреса лазера."""
+
+        if (estimator := self.estimators.get(address)) is None:
+            estimator = self.estimators[address] = RttEstimator(self.initial_rto, self.min_rto, self.timeout)
+        return estimator
+
+    def _match(self, address: tuple[str, int], answer: str) -> UdpRequest | None:
+        """Поиск ожидающего запроса для ответа (вызывается под блокировкой)."""
+
+        if not (pending := self.pending.get(address)):
+            return None
+        name = answer.split(":", 1)[0].rstrip("\r")
+        for request in pending:
+            if request.name == name and (request.expect is None or request.expect == answer):
+                return request
+        if name in self.known.get(address, ()):
+            return None                                     # эхо известной команды: устаревший ответ
+        return pending[0]                                   # сообщение об ошибке - самому раннему запросу
+
+    def _receive(self) -> None:
+        """Цикл приема и сопоставления ответов."""
+
+        buffer = bytearray(1024)
+        view = memoryview(buffer)
+        while not self._closed:
+            try:
+                count, address = self.socket.recvfrom_into(buffer)
+            except socket_timeout:
+                continue
+            except OSError as err:
+                _logger.debug("UDP receive failed: %r", err)
+                continue
+
+            now = perf_counter()
+            with self.condition:
+                if not self.pending.get(address):
+                    self.stale += 1
+                    _logger.debug("Drop datagram from %s: no pending requests", address)
+                    continue
+                try:
+                    text = str(view[:count], "ascii")
+                except UnicodeDecodeError:
+                    self.stale += 1
+                    _logger.debug("Drop non-ASCII datagram from %s: %r", address, bytes(view[:count]))
+                    continue
+                for answer in (frame + "\r" for frame in text.rstrip("\r").split("\r")):
+                    if (request := self._match(address, answer)) is None:
+                        self.stale += 1
+                        _logger.debug("Drop stale frame from %s: %r", address, answer)
+                        continue
+                    self.pending[address].remove(request)
+                    request.answer = answer
+                    if request.transmissions == 1:
+                        self.estimator(address).sample(now - request.sent)
+                self.condition.notify_all()
+
+    def _transmit(self, request: UdpRequest, now: float) -> None:
+        estimator = self.estimator(request.address)
+        if request.transmissions:
+            self.retransmits += 1
+            if request.sent >= estimator.backed_off:       # одно удвоение на истечение RTO лазера
+                estimator.backoff(now)
+        request.transmissions += 1
+        request.sent = now
+        request.resend = now + estimator.rto
+        self.sent += 1
+        try:
+            self.socket.sendto(request.packet, request.address)
+        except OSError:
+            self.pending[request.address].remove(request)
+            raise
+
+    def _discard(self, requests: list[UdpRequest]) -> None:
+        """Снятие запросов с ожидания (вызывается под блокировкой)."""
+
+        for request in requests:
+            if request in (pending := self.pending.get(request.address, ())):
+                pending.remove(request)                     # type: ignore
+
+    def submit(self, address: tuple[str, int], packet: str, expect: str | None = None) -> UdpRequest:
+        """Отправка запроса без ожидания ответа."""
+
+        request = UdpRequest(address, packet, expect)
+        with self.condition:
+            self.pending.setdefault(address, []).append(request)
+            request.start = perf_counter()
+            self._transmit(request, request.start)
+        return request
+
+    def collect(self, requests: list[UdpRequest]) -> list[str | None]:
+        """Ожидание ответов на запросы с повторной передачей по тайм-ауту.
+
+        Для запросов, оставшихся без ответа, возвращается None.
+        """
+
+        failed = set()
+        with self.condition:
+            waiting = [request for request in requests if request.answer is None]
+            try:
+                while waiting:
+                    now = perf_counter()
+                    for request in waiting:
+                        if request.answer is not None or now < request.resend:
+                            continue
+                        if now - request.start >= self.timeout or request.transmissions > self.retries:
+                            self.pending[request.address].remove(request)
+                            self.timeouts += 1
+                            failed.add(id(request))
+                            request.answer = ""
+                        else:
+                            self._transmit(request, now)
+
+                    waiting = [request for request in waiting if request.answer is None]
+                    if waiting:
+                        self.condition.wait(min(request.resend for request in waiting) - now)
+            except OSError:
+                self._discard(waiting)
+                raise
+
+        return [None if id(request) in failed else request.answer for request in requests]
+
+    def wait(self, requests: list[UdpRequest]) -> list[str]:
+        """Ожидание ответов на запросы.
+
+        Если хотя бы на один запрос ответ не получен, возбуждается
+        socket.timeout после завершения ожидания остальных.
+        """
+
+        answers = self.collect(requests)
+        for request, answer in zip(requests, answers):
+            if answer is None:
+                msg = f"No reply from {request.address[0]}:{request.address[1]} to {request.name}"
+                raise socket_timeout(msg)
+        return answers                                      # type: ignore
+
+    def exchange(self, address: tuple[str, int], packet: str, expect: str | None = None) -> str:
+        """Отправка запроса и ожидание ответа."""
+
+        return self.wait([self.submit(address, packet, expect)])[0]
+
+
+class ReliableLaserUdpClient(Protocol):
+    """Класс клиента для управления лазером по UDP с повторной передачей.
+
+    Несколько клиентов могут использовать один общий UdpTransport, тогда
+    обмен с разными лазерами идет через один сокет.
+    """
+
+    def __init__(self, device: LASER_DEVICE, address: str = "127.0.0.1:8099",
+                       timeout: float = 1.0, transport: UdpTransport | None = None) -> None:
+        """Инициализация класса клиента с указанным адресом и устройством."""
+
+        super().__init__(device)
+
+        ip, udp_port = address.split(":")
+        self.address = (ip, int(udp_port))
+        self.own_transport = transport is None
+        self.transport = transport or UdpTransport(timeout=timeout)
+        self.transport.register(self.address, frozenset(self.commands))
+
+    def __del__(self) -> None:
+        """Закрытие собственного транспорта при удалении объекта."""
+
+        self.close()
+
+    def close(self) -> None:
+        """Закрытие собственного транспорта клиента."""
+
+        if self.own_transport:
+            self.transport.close()
+
+    def _expect(self, packet: str) -> str | None:
+        name, _, value = packet.rstrip("\r").partition(" ")
+        return f"{name}: {value}\r" if value else None
+
+    def _bus_exchange(self, packet: str) -> str:
+        """Обмен по интерфейсу."""
+
+        return self.transport.exchange(self.address, packet, self._expect(packet))
+
+    def _bus_exchange_many(self, packet: str, count: int) -> list[str]:
+        """Пакетный обмен: каждая команда отправляется отдельной датаграммой."""
+
+        frames = [frame + "\r" for frame in packet.rstrip("\r").split("\r")]
+        requests: list[UdpRequest] = []
+        try:
+            for frame in frames:
+                requests.append(self.transport.submit(self.address, frame, self._expect(frame)))
+        except OSError:
+            with self.transport.condition:
+                self.transport._discard(requests)
+            raise
+        return self.transport.wait(requests)
+
+    def submit(self, cmd: str, value: float | str | None = None) -> tuple[UdpRequest, object, object]:
+        """Отправка команды без ожидания ответа (для одновременного опроса лазеров)."""
+
+        packet, reply, convert = self._request(cmd, value)
+        return self.transport.submit(self.address, packet, self._expect(packet)), reply, convert
+
+
+def send_all(clients: Iterable[ReliableLaserUdpClient], cmd: str,
+             value: float | str | None = None) -> list[float | str | bool | Exception]:
+    """Одновременная отправка команды нескольким лазерам.
+
+    Запросы ко всем лазерам отправляются сразу, затем ожидаются ответы.
+    Для каждого клиента возвращается результат или исключение.
+    """
+
+    submitted = []
+    for client in clients:
+        try:
+            submitted.append((client, *client.submit(cmd, value)))
+        except (LaserProtocolError, OSError) as err:
+            submitted.append((client, err, None, None))
+
+    answers: dict[int, str | OSError | None] = {}
+    for transport in {id(client.transport): client.transport for client, *_ in submitted}.values():
+        requests = [request for client, request, *_ in submitted
+                    if client.transport is transport and isinstance(request, UdpRequest)]
+        try:
+            answers.update(zip(map(id, requests), transport.collect(requests)))
+        except OSError as err:                              # collect уже снял запросы с ожидания
+            answers.update((id(request), err) for request in requests)
+
+    results: list[float | str | bool | Exception] = []
+    for client, request, reply, convert in submitted:
+        if isinstance(request, Exception):
+            results.append(request)
+        elif isinstance(answer := answers[id(request)], OSError):
+            results.append(answer)
+        elif answer is None:
+            results.append(socket_timeout(f"No reply from {client.address[0]}:{client.address[1]} to {cmd.upper()}"))
+        else:
+            try:
+                results.append(client._response(answer, reply, convert))   # type: ignore
+            except LaserProtocolError as err:
+                results.append(err)
+    return results
+
+
+__all__ = ["ReliableLaserUdpClient", "RttEstimator", "UdpTransport", "send_all"]